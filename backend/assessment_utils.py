@@ -1,59 +1,265 @@
 import subprocess
 import json
-from typing import Dict, Any, List
+import hashlib
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sqlalchemy.orm import Session
 import numpy as np
+import scipy.sparse as sp
+
+from config import get_settings
+from models import Submission, LSHBucket
+
+settings = get_settings()
+
+SANDBOX_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+class SandboxCrashed(Exception):
+    pass
+
+class SandboxWorker:
+    """A pre-started, resource-limited interpreter running sandbox_worker.py"""
+    
+    def __init__(self, memory_limit_mb: int):
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", SANDBOX_WORKER, str(memory_limit_mb)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            # Its own process group, so kill() also takes down the per-job children
+            start_new_session=hasattr(os, "killpg")
+        )
+        self.runs = 0
+        self._replies: "queue.Queue[Optional[dict]]" = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+    
+    def _read(self):
+        for line in self.process.stdout:
+            try:
+                self._replies.put(json.loads(line))
+            except ValueError:
+                continue
+        self._replies.put(None)  # EOF: the process exited
+    
+    def send(self, code: str, test_cases: List[Dict[str, Any]]):
+        """Start a job; only the inputs go to the sandbox, outputs are checked here"""
+        self.runs += 1
+        inputs = [{"input": case.get("input")} for case in test_cases]
+        self.process.stdin.write(json.dumps({"code": code, "test_cases": inputs}) + "\n")
+        self.process.stdin.flush()
+    
+    def receive(self, timeout: float) -> dict:
+        """Next reply; raises queue.Empty on timeout and SandboxCrashed on exit"""
+        reply = self._replies.get(timeout=timeout)
+        if reply is None:
+            raise SandboxCrashed()
+        return reply
+    
+    def receive_case(self, timeout: float) -> dict:
+        """Next test case reply; a job that ends early means its child process died"""
+        reply = self.receive(timeout)
+        if reply.get("done"):
+            raise SandboxCrashed()
+        return reply
+    
+    def alive(self) -> bool:
+        return self.process.poll() is None
+    
+    def kill(self):
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+            self.process.wait(timeout=1)
+        except Exception:
+            pass
+
+class SandboxPool:
+    """Warm sandbox processes shared by every grading request.
+
+    A submission is sent to one worker, which runs it in a freshly forked
+    child, compiling it once for every test case. A case that overruns its
+    timeout kills the worker; the remaining cases continue on a fresh one.
+    Workers are replaced after ``max_runs`` submissions or when they crash.
+    Without fork (Windows) a worker runs a single submission, so candidate
+    code never shares an interpreter with another submission.
+    """
+    
+    def __init__(self, size: int = None, max_runs: int = None, memory_limit_mb: int = None):
+        self.size = size or settings.SANDBOX_POOL_SIZE or os.cpu_count() or 1
+        self.max_runs = (max_runs or settings.SANDBOX_MAX_RUNS) if hasattr(os, "fork") else 1
+        self.memory_limit_mb = memory_limit_mb if memory_limit_mb is not None else settings.SANDBOX_MEMORY_LIMIT_MB
+        self._idle: "queue.Queue[SandboxWorker]" = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+    
+    def warm(self):
+        """Start every worker up front so the first requests don't pay for it"""
+        with self._lock:
+            while self._started < self.size:
+                self._idle.put(SandboxWorker(self.memory_limit_mb))
+                self._started += 1
+    
+    def available(self) -> int:
+        """Workers that could start a job right now"""
+        return self._idle.qsize() + (self.size - self._started)
+    
+    def _acquire(self, timeout: Optional[float] = None) -> SandboxWorker:
+        """Raises queue.Empty if no worker frees up within timeout seconds"""
+        if timeout is not None and timeout <= 0:
+            raise queue.Empty
+        with self._lock:
+            if self._idle.empty() and self._started < self.size:
+                self._started += 1
+                return SandboxWorker(self.memory_limit_mb)
+        return self._idle.get(timeout=timeout)
+    
+    def _release(self, worker: SandboxWorker):
+        if worker.alive() and worker.runs < self.max_runs:
+            self._idle.put(worker)
+            return
+        worker.kill()
+        self._idle.put(SandboxWorker(self.memory_limit_mb))
+    
+    def run(self, code: str, test_cases: List[Dict[str, Any]], timeout: float,
+            deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Raw per-case replies in test case order.
+
+        Each reply is {"actual", "error"}, {"timeout": True} for a case that
+        overran, or {"budget_exceeded": True} for cases not run before the
+        ``deadline`` (a time.monotonic() value).
+        """
+        return list(self.iter_run(code, test_cases, timeout, deadline))
+    
+    def iter_run(self, code: str, test_cases: List[Dict[str, Any]], timeout: float,
+                 deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Like run, yielding each case's reply as soon as the worker sends it"""
+        done = 0
+        
+        def case_timeout() -> float:
+            if deadline is None:
+                return timeout
+            return max(min(timeout, deadline - time.monotonic()), 0)
+        
+        while done < len(test_cases):
+            try:
+                # Waiting for a busy pool counts against the budget too
+                worker = self._acquire(None if deadline is None else deadline - time.monotonic())
+            except queue.Empty:
+                for _ in test_cases[done:]:
+                    yield {"budget_exceeded": True}
+                return
+            failure = None
+            try:
+                remaining = test_cases[done:]
+                worker.send(code, remaining)
+                for _ in remaining:
+                    reply = worker.receive_case(case_timeout())
+                    done += 1
+                    yield reply
+                worker.receive(case_timeout())  # done marker
+            except queue.Empty:
+                worker.kill()
+                failure = {"timeout": True}
+            except (SandboxCrashed, OSError):
+                worker.kill()
+                failure = {"actual": "", "error": "Sandbox process crashed"}
+            finally:
+                # Also runs when the consumer stops early, so the worker isn't leaked
+                self._release(worker)
+            if failure is not None and done < len(test_cases):
+                done += 1
+                yield failure
+    
+    def shutdown(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().kill()
+        self._started = 0
 
 class CodeExecutor:
-    """Execute code safely in subprocess"""
+    """Execute code safely in pooled sandbox processes"""
     
-    def execute_python_code(self, code: str, test_cases: List[Dict[str, Any]], 
-                           timeout: int = 5) -> Dict[str, Any]:
-        """Execute Python code with test cases"""
-        results = []
+    # Part of the grading cache key; bump whenever grading semantics change
+    VERSION = "3"  # 3: inputs-only, fork-per-job sandbox protocol
+    
+    def __init__(self, pool: SandboxPool = None, max_parallel_cases: int = None):
+        self.pool = pool or SandboxPool()
+        self.max_parallel_cases = max_parallel_cases or settings.GRADING_MAX_PARALLEL_CASES
+        self._chunk_threads = ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix="sandbox-chunk")
+    
+    def _iter_cases(self, code: str, test_cases: List[Dict[str, Any]], timeout: float,
+                    deadline: Optional[float]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(index, raw reply) pairs as cases finish, spread over idle sandbox
+        workers (i.e. free cores); order is only kept within a worker's chunk"""
+        chunks = max(1, min(len(test_cases), self.max_parallel_cases, self.pool.available()))
+        if chunks == 1:
+            yield from enumerate(self.pool.iter_run(code, test_cases, timeout, deadline))
+            return
+        
+        size = -(-len(test_cases) // chunks)
+        replies: "queue.Queue[Tuple[int, Any]]" = queue.Queue()
         
-        for test_case in test_cases:
+        def run_chunk(start: int):
             try:
-                # Create test code
-                test_code = f"""
-{code}
-
-# Test case
-test_input = {test_case.get('input')}
-result = main(test_input) if 'main' in dir() else eval(test_input)
-print(result)
-"""
-                
-                # Execute with timeout
-                process = subprocess.run(
-                    ['python', '-c', test_code],
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout
-                )
-                
-                output = process.stdout.strip()
-                expected = str(test_case.get('expected_output', '')).strip()
-                
-                results.append({
-                    "passed": output == expected,
-                    "expected": expected,
-                    "actual": output,
-                    "error": process.stderr if process.stderr else None
-                })
-                
-            except subprocess.TimeoutExpired:
-                results.append({
-                    "passed": False,
-                    "error": "Code execution timed out"
-                })
+                for offset, reply in enumerate(self.pool.iter_run(code, test_cases[start:start + size],
+                                                                  timeout, deadline)):
+                    replies.put((start + offset, reply))
             except Exception as e:
-                results.append({
-                    "passed": False,
-                    "error": str(e)
-                })
+                replies.put((-1, e))
         
+        for i in range(0, len(test_cases), size):
+            self._chunk_threads.submit(run_chunk, i)
+        for _ in test_cases:
+            index, reply = replies.get()
+            if index < 0:
+                raise reply
+            yield index, reply
+    
+    @staticmethod
+    def _case_result(test_case: Dict[str, Any], reply: Dict[str, Any]) -> Dict[str, Any]:
+        if reply.get("timeout"):
+            return {"passed": False, "error": "Code execution timed out"}
+        if reply.get("budget_exceeded"):
+            return {"passed": False, "error": "Grading time budget exceeded"}
+        
+        output = reply.get("actual", "")
+        expected = str(test_case.get('expected_output', '')).strip()
+        return {
+            "passed": output == expected,
+            "expected": expected,
+            "actual": output,
+            "error": reply.get("error")
+        }
+    
+    def iter_python_code(self, code: str, test_cases: List[Dict[str, Any]], timeout: int = 5,
+                         deadline: Optional[float] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Grade test cases, yielding (index, result) for each as soon as it finishes.
+
+        The streaming core behind execute_python_code; results may arrive out
+        of order when cases run on several workers.
+        """
+        test_cases = test_cases or []
+        for index, reply in self._iter_cases(code, test_cases, timeout, deadline):
+            yield index, self._case_result(test_cases[index], reply)
+    
+    @staticmethod
+    def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Final grading result from per-case results in test case order"""
         passed_count = sum(1 for r in results if r.get("passed", False))
         total_count = len(results)
         
@@ -63,12 +269,224 @@ print(result)
             "total": total_count,
             "score_percentage": (passed_count / total_count * 100) if total_count > 0 else 0
         }
+    
+    def execute_python_code(self, code: str, test_cases: List[Dict[str, Any]], 
+                           timeout: int = 5, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Execute Python code with test cases.
+
+        ``deadline`` (time.monotonic()) caps the whole submission; cases that
+        don't get to run before it fail with a budget error.
+        """
+        results = dict(self.iter_python_code(code, test_cases, timeout, deadline))
+        return self.summarize([results[i] for i in range(len(results))])
+
+class PlagiarismIndex:
+    """TF-IDF index over the earlier submissions to a single question.
+
+    Holds one fitted vocabulary and an L2-normalised sparse matrix with a row
+    per submission, so scoring a new answer against all of them is a single
+    sparse matrix-vector product. Appends reuse the fitted vocabulary; the
+    vocabulary is refitted on the full corpus every ``rebuild_every`` appends.
+    """
+    
+    def __init__(self, rebuild_every: int = 500):
+        self.rebuild_every = rebuild_every
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Drop every indexed submission; the lock is kept so waiting threads stay serialized"""
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.matrix = None
+        self.ids: List[int] = []
+        self.texts: List[str] = []
+        self.last_id = 0  # highest Submission.id seen, including empty answers
+        self.appends_since_fit = 0
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def refit_due(self, appends: int) -> bool:
+        """Whether appending this many submissions would refit the vocabulary"""
+        return self.vectorizer is None or self.appends_since_fit + appends >= self.rebuild_every
+    
+    def add(self, items: List[Tuple[int, str]]):
+        """Append (submission_id, text) pairs"""
+        if not items:
+            return
+        refit = self.refit_due(len(items))
+        self.ids.extend(i for i, _ in items)
+        self.texts.extend(t for _, t in items)
+        self.appends_since_fit += len(items)
+        
+        if refit:
+            self._fit()
+        else:
+            rows = self.vectorizer.transform([t for _, t in items])
+            self.matrix = sp.vstack([self.matrix, rows], format="csr")
+    
+    def _fit(self):
+        vectorizer = TfidfVectorizer()
+        try:
+            self.matrix = vectorizer.fit_transform(self.texts).tocsr()
+            self.vectorizer = vectorizer
+        except ValueError:
+            # Empty vocabulary (e.g. only punctuation so far), try again on the next append
+            self.vectorizer = None
+            self.matrix = None
+        self.appends_since_fit = 0
+    
+    def query(self, text: str) -> List[Tuple[int, float]]:
+        """Cosine similarity (as a percentage) of text against every indexed submission"""
+        if self.vectorizer is None or not self.ids:
+            return []
+        vector = self.vectorizer.transform([text])
+        similarities = np.asarray((self.matrix @ vector.T).todense()).ravel() * 100
+        return list(zip(self.ids, similarities.tolist()))
+
+class MinHasher:
+    """MinHash signatures over token shingles, split into LSH bands.
+
+    Two texts land in the same bucket for at least one band with probability
+    1 - (1 - J^r)^b for Jaccard similarity J, r rows per band and b bands.
+    The defaults (128 permutations, 32 bands of 4) put the threshold near J=0.42.
+    """
+    
+    PRIME = 4294967291  # largest prime below 2**32, keeps a*x+b inside uint64
+    TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+    
+    def __init__(self, num_perm: int = 128, bands: int = 32, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, self.PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, self.PRIME, size=num_perm, dtype=np.uint64)
+    
+    def shingles(self, text: str) -> set:
+        tokens = self.TOKEN_RE.findall(text.lower())
+        if len(tokens) < self.shingle_size:
+            return {" ".join(tokens)} if tokens else set()
+        k = self.shingle_size
+        return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+    
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """uint64 array of num_perm minimum hashes, or None for a text without tokens"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(hashes, self.a) + self.b) % self.PRIME
+        return permuted.min(axis=0)
+    
+    def band_hashes(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        """(band, bucket_hash) pairs; hashes fit a signed 64-bit column.
+
+        The band number is mixed into the hash so that a lookup is a plain
+        ``bucket_hash IN (...)`` on one index.
+        """
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(chunk, digest_size=8, salt=band.to_bytes(16, "big")).digest()
+            keys.append((band, int.from_bytes(digest, "big") & 0x7FFFFFFFFFFFFFFF))
+        return keys
+    
+    @staticmethod
+    def estimate_jaccard(sig1: np.ndarray, sig2: np.ndarray) -> float:
+        return float(np.mean(sig1 == sig2))
+
+class MinHashLSHIndex:
+    """Database-backed LSH index: signatures on Submission, buckets in lsh_buckets.
+
+    A lookup fetches the submissions sharing at least one bucket with the new
+    answer, keeps the best ``max_candidates`` by estimated Jaccard and
+    re-scores only those exactly with TF-IDF. Cost depends on the number of
+    colliding submissions, not on the size of the cohort.
+    """
+    
+    def __init__(self, hasher: MinHasher = None, max_candidates: int = None):
+        self.hasher = hasher or MinHasher(num_perm=settings.MINHASH_NUM_PERM, bands=settings.MINHASH_BANDS)
+        self.max_candidates = max_candidates or settings.MINHASH_MAX_CANDIDATES
+    
+    def candidates(self, db: Session, question_id: int, signature: np.ndarray) -> List[Tuple[int, str]]:
+        hashes = [bucket_hash for _, bucket_hash in self.hasher.band_hashes(signature)]
+        ids = [row[0] for row in db.query(LSHBucket.submission_id).filter(
+            LSHBucket.question_id == question_id,
+            LSHBucket.bucket_hash.in_(hashes)
+        ).distinct().all()]
+        if not ids:
+            return []
+        
+        rows = db.query(Submission.id, Submission.code_submission, Submission.answer,
+                        Submission.minhash_signature).filter(Submission.id.in_(ids)).all()
+        scored = []
+        for row in rows:
+            text = row.code_submission or row.answer
+            if not text or not row.minhash_signature:
+                continue
+            estimate = self.hasher.estimate_jaccard(signature, np.array(row.minhash_signature, dtype=np.uint64))
+            scored.append((estimate, row.id, text))
+        scored.sort(reverse=True)
+        return [(submission_id, text) for _, submission_id, text in scored[:self.max_candidates]]
+    
+    def add(self, db: Session, submission: Submission, content: str):
+        """Store the signature and bucket rows for a flushed submission"""
+        signature = self.hasher.signature(content)
+        if signature is None:
+            return
+        submission.minhash_signature = signature.tolist()
+        db.add_all([
+            LSHBucket(question_id=submission.question_id, submission_id=submission.id,
+                      band=band, bucket_hash=bucket_hash)
+            for band, bucket_hash in self.hasher.band_hashes(signature)
+        ])
+    
+    def backfill(self, db: Session, batch_size: int = 500) -> int:
+        """Index submissions stored before the minhash backend was enabled"""
+        count = 0
+        while True:
+            batch = db.query(Submission).filter(
+                Submission.minhash_signature.is_(None),
+                (Submission.code_submission.isnot(None)) | (Submission.answer.isnot(None))
+            ).order_by(Submission.id).limit(batch_size).all()
+            indexed = 0
+            for submission in batch:
+                content = submission.code_submission or submission.answer
+                self.add(db, submission, content)
+                if submission.minhash_signature is None:
+                    submission.minhash_signature = []  # nothing to hash, don't revisit
+                indexed += 1
+            db.commit()
+            count += indexed
+            if len(batch) < batch_size:
+                return count
 
 class PlagiarismDetector:
-    """Detect code/text similarity"""
+    """Detect code/text similarity.
+
+    Two backends: ``tfidf`` scores against every earlier submission through an
+    in-memory per-question index; ``minhash`` looks up near-duplicate
+    candidates in LSH buckets stored in the database and re-scores only those.
+    """
+    
+    SUSPICION_THRESHOLD = 70
+    PLAGIARISM_THRESHOLD = 80
     
-    def __init__(self):
+    def __init__(self, backend: str = None, rebuild_every: int = None, max_indexes: int = None):
+        self.backend = backend or settings.PLAGIARISM_BACKEND
+        if self.backend not in ("tfidf", "minhash"):
+            raise ValueError(f"Unknown plagiarism backend: {self.backend}")
         self.vectorizer = TfidfVectorizer()
+        self.lsh = MinHashLSHIndex() if self.backend == "minhash" else None
+        self.rebuild_every = rebuild_every or settings.PLAGIARISM_REBUILD_EVERY
+        self.max_indexes = max_indexes or settings.PLAGIARISM_MAX_INDEXES
+        self._indexes: "OrderedDict[int, PlagiarismIndex]" = OrderedDict()
+        self._lock = threading.Lock()
     
     def check_similarity(self, text1: str, text2: str) -> float:
         """Calculate cosine similarity between two texts"""
@@ -79,29 +497,89 @@ class PlagiarismDetector:
         except:
             return 0.0
     
-    def check_against_database(self, submission: str, 
-                               previous_submissions: List[str]) -> Dict[str, Any]:
-        """Check submission against all previous submissions"""
-        if not previous_submissions:
-            return {"is_plagiarized": False, "max_similarity": 0.0, "similar_to": []}
-        
-        similarities = []
-        for idx, prev_sub in enumerate(previous_submissions):
-            similarity = self.check_similarity(submission, prev_sub)
-            if similarity > 70:  # Threshold for suspicion
-                similarities.append({
-                    "submission_id": idx,
-                    "similarity": similarity
-                })
+    def _summarize(self, matches: List[Tuple[int, float]]) -> Dict[str, Any]:
+        similarities = [{"submission_id": submission_id, "similarity": similarity}
+                        for submission_id, similarity in matches
+                        if similarity > self.SUSPICION_THRESHOLD]
         
         max_sim = max([s["similarity"] for s in similarities]) if similarities else 0.0
         
         return {
-            "is_plagiarized": max_sim > 80,
+            "is_plagiarized": max_sim > self.PLAGIARISM_THRESHOLD,
             "max_similarity": max_sim,
             "similar_submissions": similarities,
-            "flagged": max_sim > 70
+            "flagged": max_sim > self.SUSPICION_THRESHOLD
         }
+    
+    def check_against_database(self, submission: str, 
+                               previous_submissions: List[str],
+                               submission_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Check submission against a list of previous submissions with a single TF-IDF fit"""
+        if not previous_submissions:
+            return self._summarize([])
+        
+        ids = submission_ids if submission_ids is not None else list(range(len(previous_submissions)))
+        try:
+            tfidf = self.vectorizer.fit_transform([submission] + list(previous_submissions))
+        except ValueError:
+            return self._summarize([])
+        similarities = cosine_similarity(tfidf[0:1], tfidf[1:])[0] * 100
+        return self._summarize(list(zip(ids, similarities.tolist())))
+    
+    def _index_for(self, question_id: int) -> PlagiarismIndex:
+        with self._lock:
+            index = self._indexes.get(question_id)
+            if index is None:
+                index = self._indexes[question_id] = PlagiarismIndex(self.rebuild_every)
+            self._indexes.move_to_end(question_id)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+            return index
+    
+    def _sync(self, db: Session, question_id: int, index: PlagiarismIndex):
+        """Pull submissions stored since the index was last synced.
+
+        Only (id, text) columns are loaded, never full ORM rows. Another API
+        process may have committed ids below last_id after we synced, so when
+        the new rows would refit the vocabulary the index is reloaded from
+        scratch instead; the reload costs the same single fit.
+        """
+        def load(after_id: int) -> Tuple[int, List[Tuple[int, str]]]:
+            rows = db.query(Submission.id, Submission.code_submission, Submission.answer).filter(
+                Submission.question_id == question_id,
+                Submission.id > after_id
+            ).order_by(Submission.id).all()
+            items = [(row.id, row.code_submission or row.answer) for row in rows
+                     if row.code_submission or row.answer]
+            return (rows[-1].id if rows else after_id), items
+        
+        last_id, items = load(index.last_id)
+        if index.vectorizer is not None and items and index.refit_due(len(items)):
+            index.reset()
+            last_id, items = load(0)
+        index.add(items)
+        index.last_id = last_id
+    
+    def check_submission(self, db: Session, question_id: int, content: str) -> Dict[str, Any]:
+        """Check an answer against the stored submissions for the question"""
+        if self.backend == "minhash":
+            signature = self.lsh.hasher.signature(content)
+            if signature is None:
+                return self._summarize([])
+            candidates = self.lsh.candidates(db, question_id, signature)
+            return self.check_against_database(content, [text for _, text in candidates],
+                                               [submission_id for submission_id, _ in candidates])
+        
+        index = self._index_for(question_id)
+        with index.lock:
+            self._sync(db, question_id, index)
+            matches = index.query(content)
+        return self._summarize(matches)
+    
+    def record_submission(self, db: Session, submission: Submission, content: str):
+        """Index a flushed submission; the TF-IDF backend picks rows up on its own"""
+        if self.backend == "minhash":
+            self.lsh.add(db, submission, content)
 
 class AnomalyDetector:
     """Detect suspicious assessment behavior"""
@@ -1,8 +1,13 @@
 from passlib.context import CryptContext
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+import threading
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
+from sqlalchemy import event, inspect
 from config import get_settings
+from models import User
+from response_cache import LRUCache
 
 settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -29,3 +34,82 @@ def verify_token(token: str):
         return payload
     except JWTError:
         return None
+
+# ==================== USER RESOLUTION CACHE ====================
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached, read-only view of the user behind a token"""
+    id: int
+    email: str
+    full_name: str
+    role: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(id=user.id, email=user.email, full_name=user.full_name, role=user.role)
+
+class UserCache:
+    """Bounded TTL cache of UserSnapshots keyed by token subject.
+
+    Entries are dropped when a User row is updated or deleted through the
+    ORM in this process; the TTL bounds staleness for changes made anywhere
+    else (other workers, raw SQL).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.enabled = ttl_seconds > 0
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._lookup_seconds = 0.0
+
+    def get(self, subject: str) -> Optional[UserSnapshot]:
+        user = self._cache.get(subject) if self.enabled else None
+        with self._lock:
+            if user is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return user
+
+    def put(self, subject: str, user: UserSnapshot, lookup_seconds: float):
+        """Store a snapshot along with how long the database lookup took"""
+        with self._lock:
+            self._lookup_seconds += lookup_seconds
+        if self.enabled:
+            self._cache.set(subject, user)
+
+    def invalidate(self, *subjects: str):
+        for subject in subjects:
+            self._cache.delete(subject)
+        with self._lock:
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self._hits + self._misses
+            lookup_ms = self._lookup_seconds / self._misses * 1000 if self._misses else 0.0
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / requests if requests else 0.0,
+                "lookup_ms_avg": lookup_ms,
+                # Average database time a cache hit avoids, spread over all requests
+                "saved_ms_per_request": lookup_ms * self._hits / requests if requests else 0.0
+            }
+
+user_cache = UserCache(max_entries=settings.AUTH_USER_CACHE_ENTRIES,
+                       ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    # Also drop the old subject if the email itself changed
+    previous = inspect(target).attrs.email.history.deleted or ()
+    user_cache.invalidate(target.email, *previous)
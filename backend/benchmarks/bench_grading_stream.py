@@ -0,0 +1,93 @@
+"""Time to first feedback for a slow coding submission: /submit vs /submit:stream.
+
+Serves the app (see serve_fake.py) on a seeded SQLite database with one
+coding question whose test cases each take a while, then submits the same
+kind of answer through the blocking endpoint and through the SSE endpoint,
+printing when each test case result arrived.
+
+Usage: python benchmarks/bench_grading_stream.py [--cases 5] [--case-seconds 0.5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+import httpx
+from jose import jwt
+from sqlalchemy import create_engine, insert
+
+from bench_load import SECRET_KEY, start_server, wait_until_up
+from models import Assessment, Job, Question, User
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(db_path: str, cases: int) -> str:
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        conn.execute(insert(Job), [{"id": 1, "title": "Backend Developer", "description": "...",
+                                    "generation_status": "ready"}])
+        conn.execute(insert(Question), [{
+            "id": 1, "job_id": 1, "question_type": "coding", "question_text": "Add one",
+            "difficulty": "easy", "skill_tested": "Python", "max_score": 10.0,
+            "test_cases": [{"input": str(i), "expected_output": str(i + 1)} for i in range(cases)]
+        }])
+        conn.execute(insert(User), [{"id": 1, "email": "c1@example.com", "full_name": "C", "role": "candidate"}])
+        conn.execute(insert(Assessment), [{"id": 1, "job_id": 1, "candidate_id": 1, "status": "in_progress"}])
+    engine.dispose()
+    return jwt.encode({"sub": "c1@example.com"}, SECRET_KEY, algorithm="HS256")
+
+
+def answer(case_seconds: float, attempt: int) -> dict:
+    # A different comment each time so the grading cache doesn't answer
+    code = f"import time\ndef main(x):\n    time.sleep({case_seconds})  # attempt {attempt}\n    return x + 1"
+    return {"question_id": 1, "answer": None, "selected_option": None, "code_submission": code}
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(BACKEND_DIR, workdir, args.port, 0.0, GRADING_CACHE_ENABLED="false")
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=120) as client:
+                await wait_until_up(client)
+                token = seed(os.path.join(workdir, "load.db"), args.cases)
+                headers = {"Authorization": f"Bearer {token}"}
+
+                start = time.perf_counter()
+                response = await client.post("/assessments/1/submit", headers=headers,
+                                             json=answer(args.case_seconds, 1))
+                print(f"/submit         {response.status_code}, nothing until {time.perf_counter() - start:5.2f}s: "
+                      f"{response.json()['ai_feedback']}")
+
+                start = time.perf_counter()
+                async with client.stream("POST", "/assessments/1/submit:stream", headers=headers,
+                                         json=answer(args.case_seconds, 2)) as response:
+                    print(f"/submit:stream  {response.status_code}")
+                    event = None
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: "):
+                            event = line[len("event: "):]
+                        elif line.startswith("data: "):
+                            data = json.loads(line[len("data: "):])
+                            summary = (f"case {data['index']} passed={data['passed']}" if event == "case"
+                                       else data.get("ai_feedback", data))
+                            print(f"    {time.perf_counter() - start:5.2f}s  {event:<6} {summary}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=5)
+    parser.add_argument("--case-seconds", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
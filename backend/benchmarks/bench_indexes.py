@@ -0,0 +1,137 @@
+"""Hot-path queries before and after the index migration.
+
+Seeds a SQLite database with the current schema minus the hot-path indexes
+(the state of a database created by an older release), prints the query plan
+and latency of each hot query, applies the index migration and repeats.
+
+Usage: python benchmarks/bench_indexes.py [--jobs 200] [--assessments 20000] [--questions 10]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+from sqlalchemy import create_engine, insert, text
+
+import migrations
+from database import Base
+from models import Assessment, Evaluation, Job, Question, Submission, User
+
+HOT_INDEXES = [
+    ("questions", "ix_questions_job_id"),
+    ("submissions", "ix_submissions_assessment_question"),
+    ("submissions", "ix_submissions_question_id"),
+    ("assessments", "ix_assessments_job_status_score"),
+    ("assessments", "uq_assessments_job_candidate"),
+    ("evaluations", "ix_evaluations_assessment_id"),
+]
+
+QUERIES = {
+    "questions for a job":
+        "SELECT * FROM questions WHERE job_id = :job_id",
+    "submissions of an assessment":
+        "SELECT * FROM submissions WHERE assessment_id = :assessment_id",
+    "score aggregate on completion":
+        "SELECT q.skill_tested, q.question_type, SUM(s.score), COUNT(s.id) FROM submissions s "
+        "JOIN questions q ON q.id = s.question_id WHERE s.assessment_id = :assessment_id "
+        "GROUP BY q.skill_tested, q.question_type",
+    "plagiarism history sync":
+        "SELECT id, answer FROM submissions WHERE question_id = :question_id AND id > :last_id",
+    "existing assessment check":
+        "SELECT id FROM assessments WHERE job_id = :job_id AND candidate_id = :candidate_id",
+    "completed assessments by score":
+        "SELECT id FROM assessments WHERE job_id = :job_id AND status = 'completed' "
+        "ORDER BY total_score DESC LIMIT 100",
+    "evaluation of an assessment":
+        "SELECT * FROM evaluations WHERE assessment_id = :assessment_id",
+}
+
+
+def seed(engine, jobs: int, assessments: int, questions: int):
+    rng = random.Random(5)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Job), [{"id": j, "title": f"Job {j}", "description": "..."}
+                                   for j in range(1, jobs + 1)])
+        conn.execute(insert(Question), [{
+            "id": (j - 1) * questions + q, "job_id": j, "question_type": ("mcq", "subjective", "coding")[q % 3],
+            "question_text": f"q{q}", "skill_tested": f"skill{q % 4}", "max_score": 10.0
+        } for j in range(1, jobs + 1) for q in range(1, questions + 1)])
+        conn.execute(insert(User), [{"id": i, "email": f"c{i}@example.com", "full_name": f"C {i}",
+                                     "role": "candidate"} for i in range(1, assessments + 1)])
+        rows = []
+        for i in range(1, assessments + 1):
+            score = float(rng.randint(0, questions * 10))
+            rows.append({"id": i, "job_id": rng.randint(1, jobs), "candidate_id": i,
+                         "status": "completed", "total_score": score, "max_possible_score": questions * 10.0,
+                         "percentage": score / questions * 10, "completed_at": start + timedelta(seconds=i)})
+        conn.execute(insert(Assessment), rows)
+        conn.execute(insert(Evaluation), [{"assessment_id": r["id"], "skill_scores": {}} for r in rows])
+        conn.execute(insert(Submission), [{
+            "assessment_id": r["id"], "question_id": (r["job_id"] - 1) * questions + q,
+            "answer": "some answer", "score": float(rng.randint(0, 10))
+        } for r in rows for q in range(1, questions + 1)])
+
+
+def sample_params(rng: random.Random, jobs: int, assessments: int, questions: int):
+    assessment_id = rng.randint(1, assessments)
+    job_id = rng.randint(1, jobs)
+    return {"job_id": job_id, "assessment_id": assessment_id, "candidate_id": assessment_id,
+            "question_id": (job_id - 1) * questions + rng.randint(1, questions),
+            "last_id": 0}
+
+
+def report(engine, label: str, jobs: int, assessments: int, questions: int, runs: int = 30):
+    print(f"\n== {label} ==")
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            rng = random.Random(11)
+            params = [sample_params(rng, jobs, assessments, questions) for _ in range(runs)]
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params[0]).fetchall()
+            timings = []
+            for p in params:
+                start = time.perf_counter()
+                conn.execute(text(sql), p).fetchall()
+                timings.append(time.perf_counter() - start)
+            print(f"{name:<32} p50={statistics.median(timings) * 1000:8.3f}ms")
+            for row in plan:
+                print(f"    {row[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--assessments", type=int, default=20000)
+    parser.add_argument("--questions", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for _, name in HOT_INDEXES:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+        start = time.perf_counter()
+        seed(engine, args.jobs, args.assessments, args.questions)
+        print(f"seeded {args.assessments} assessments, {args.assessments * args.questions} submissions "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        report(engine, "before (no hot-path indexes)", args.jobs, args.assessments, args.questions)
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            migrations._add_hot_path_indexes(conn)
+            conn.execute(text("ANALYZE"))
+        print(f"\nindex migration took {time.perf_counter() - start:.1f}s")
+
+        report(engine, "after", args.jobs, args.assessments, args.questions)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""GET /jobs query cost on a large catalogue: offset vs keyset pages, skill filters.
+
+Seeds a SQLite database with N jobs (each with a few skills drawn from a
+skewed distribution) and times:
+
+- offset pagination at increasing depth vs job_listing.page with a cursor
+- skill filters as the old way would have to do them (load every active
+  job and scan required_skills in Python) vs the job_skills join
+
+Usage: python benchmarks/bench_jobs.py [--jobs 100000] [--limit 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+import job_listing
+import migrations
+from models import Job, JobSkill
+
+# Skill -> share of jobs that require it
+SKILLS = {"Python": 0.4, "SQL": 0.3, "JavaScript": 0.25, "AWS": 0.15, "Docker": 0.12,
+          "Kubernetes": 0.06, "Go": 0.03, "Rust": 0.005}
+
+
+def seed(engine, jobs: int):
+    rng = random.Random(3)
+    start = datetime(2023, 1, 1)
+    rows, skill_rows = [], []
+    for i in range(1, jobs + 1):
+        skills = [s for s, share in SKILLS.items() if rng.random() < share]
+        rows.append({"id": i, "title": f"Job {i}", "description": "...", "required_skills": skills,
+                     "generation_status": "ready", "is_active": rng.random() > 0.05,
+                     # Batch imports share a timestamp, which the id tie-break has to handle
+                     "created_at": start + timedelta(minutes=i // 3)})
+        skill_rows.extend({"job_id": i, "skill": s} for s in job_listing.normalize_skills(skills))
+    with engine.begin() as conn:
+        conn.execute(insert(Job), rows)
+        conn.execute(insert(JobSkill), skill_rows)
+        conn.execute(text("ANALYZE"))
+
+
+def timed(fn, runs: int = 5) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'jobs.db')}")
+        migrations.migrate(engine)
+        start = time.perf_counter()
+        seed(engine, args.jobs)
+        print(f"seeded {args.jobs} jobs in {time.perf_counter() - start:.1f}s")
+        Session = sessionmaker(bind=engine)
+        db = Session()
+
+        active = db.scalar(select(func.count(Job.id)).where(Job.is_active == True))
+        print("\n== pagination (page of", args.limit, "at depth) ==")
+        last_page = max(active - args.limit, 0)
+        for depth in sorted({min(depth, last_page) for depth in (0, 1000, 10000, active // 2, last_page)}):
+            offset_ms = timed(lambda: db.scalars(
+                select(Job).where(Job.is_active == True).order_by(*job_listing.ORDER_BY)
+                .offset(depth).limit(args.limit)).all())
+            # The cursor a client holds after `depth` rows
+            last = db.scalars(select(Job).where(Job.is_active == True).order_by(*job_listing.ORDER_BY)
+                              .offset(max(depth - 1, 0)).limit(1)).first()
+            cursor = job_listing.encode_cursor(last) if depth else None
+            keyset_ms = timed(lambda: job_listing.page(db, args.limit, cursor))
+            print(f"depth {depth:>7}  offset {offset_ms:8.2f}ms  keyset {keyset_ms:6.2f}ms")
+
+        print("\n== skill filter (first page, all skills required) ==")
+
+        def python_scan(skills):
+            wanted = set(job_listing.normalize_skills(skills))
+            matches = [job for job in db.scalars(select(Job).where(Job.is_active == True)
+                                                 .order_by(*job_listing.ORDER_BY))
+                       if wanted <= set(job_listing.normalize_skills(job.required_skills))]
+            return matches[:args.limit]
+
+        for skills in (["python"], ["python", "sql"], ["kubernetes", "go"], ["rust"], ["rust", "go", "aws"]):
+            expected = [job.id for job in python_scan(skills)]
+            got = [job.id for job in job_listing.page(db, args.limit, skills=skills)[0]]
+            assert got == expected, f"{skills}: {got} != {expected}"
+            scan_ms = timed(lambda: python_scan(skills), runs=1)
+            indexed_ms = timed(lambda: job_listing.page(db, args.limit, skills=skills))
+            print(f"{'+'.join(skills):<20} python scan {scan_ms:9.1f}ms  job_skills {indexed_ms:6.2f}ms")
+
+        compiled = select(Job).where(Job.is_active == True, Job.id.in_(
+            select(JobSkill.job_id).where(JobSkill.skill == "rust"))).order_by(*job_listing.ORDER_BY).limit(20)
+        with engine.connect() as conn:
+            sql = str(compiled.compile(conn, compile_kwargs={"literal_binds": True}))
+            print("\nplan for skill=rust:")
+            for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)):
+                print(f"    {row[-1]}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Leaderboard reads: per-row Evaluation lookups vs the materialized table.
+
+Seeds a SQLite database with one job and N completed assessments (default
+50k), then times the original N+1 read, the first page, a deep page reached
+by cursor and a top-10 read.
+
+Usage: python benchmarks/bench_leaderboard.py [--candidates 50000] [--limit 100]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import leaderboard
+from database import Base
+from models import Assessment, Evaluation, Job, LeaderboardRecord, User
+
+
+def seed(db, candidates: int):
+    rng = random.Random(3)
+    start = datetime(2024, 1, 1)
+    db.execute(insert(Job), [{"id": 1, "title": "Backend Developer", "description": "..."}])
+    db.execute(insert(User), [{"id": i, "email": f"c{i}@example.com", "full_name": f"Candidate {i}",
+                               "role": "candidate"} for i in range(1, candidates + 1)])
+    rows = []
+    for i in range(1, candidates + 1):
+        score = float(rng.randint(0, 200))
+        rows.append({"id": i, "job_id": 1, "candidate_id": i, "status": "completed",
+                     "total_score": score, "max_possible_score": 200.0, "percentage": score / 2,
+                     "rank": None, "completed_at": start + timedelta(seconds=i)})
+    db.execute(insert(Assessment), rows)
+    db.execute(insert(Evaluation), [{"assessment_id": r["id"], "skill_scores": {"python": r["percentage"]}}
+                                    for r in rows])
+    db.execute(insert(LeaderboardRecord), [{
+        "job_id": 1, "assessment_id": r["id"], "candidate_id": r["candidate_id"],
+        "candidate_name": f"Candidate {r['candidate_id']}", "total_score": r["total_score"],
+        "percentage": r["percentage"], "skill_scores": {"python": r["percentage"]},
+        "completed_at": r["completed_at"]} for r in rows])
+    db.commit()
+
+
+def legacy_read(db):
+    """The original endpoint body: one Evaluation query per assessment"""
+    assessments = db.query(Assessment, User).join(User).filter(
+        Assessment.job_id == 1, Assessment.status == "completed"
+    ).order_by(Assessment.rank).all()
+    result = []
+    for assessment, user in assessments:
+        evaluation = db.query(Evaluation).filter(Evaluation.assessment_id == assessment.id).first()
+        result.append((user.full_name, evaluation.skill_scores if evaluation else {}))
+    return result
+
+
+def timed(fn, runs: int = 5) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=50000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "leaderboard_bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    seed(db, args.candidates)
+
+    # Walk to a page about 80% of the way down to get a deep cursor
+    cursor = None
+    for _ in range(int(args.candidates * 0.8) // args.limit):
+        _, cursor = leaderboard.page(db, 1, args.limit, cursor)
+
+    print(f"{args.candidates} completed assessments, page size {args.limit}")
+    print(f"  legacy N+1 full read    {timed(lambda: legacy_read(Session()), runs=1):10.1f} ms")
+    print(f"  materialized first page {timed(lambda: leaderboard.page(db, 1, args.limit)):10.2f} ms")
+    print(f"  materialized deep page  {timed(lambda: leaderboard.page(db, 1, args.limit, cursor)):10.2f} ms")
+    print(f"  materialized top-10     {timed(lambda: leaderboard.page(db, 1, 10)):10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""LLM client behaviour against a flaky fake provider.
+
+- transient errors: share of calls that succeed with and without retries
+- outage: time callers spend on a provider that hangs then fails, with and
+  without the circuit breaker
+- rate limit: calls per second from several threads, and from several
+  processes sharing the bucket through a SQLite database
+
+Usage: python benchmarks/bench_llm_client.py [--calls 200] [--error-rate 0.2]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+from sqlalchemy import create_engine
+
+import migrations
+from llm_client import CircuitBreaker, LLMClient, LLMUnavailable, SharedTokenBucket, TokenBucket
+
+
+class ProviderError(Exception):
+    """Looks like a google.api_core error to the client"""
+
+    def __init__(self, code: int):
+        super().__init__(f"{code} from provider")
+        self.code = code
+
+
+class FlakyModel(fakes.FakeModel):
+    def __init__(self, latency: float, error_rate: float = 0.0, hang: float = 0.0, seed: int = 1):
+        super().__init__(latency)
+        self.error_rate = error_rate
+        self.hang = hang  # an outage: every call takes this long, then fails
+        self.rng = random.Random(seed)
+
+    def generate_content(self, prompt: str) -> fakes.FakeResponse:
+        self.calls += 1
+        if self.hang:
+            time.sleep(self.hang)
+            raise ProviderError(503)
+        time.sleep(self.latency)
+        if self.rng.random() < self.error_rate:
+            raise ProviderError(self.rng.choice((429, 500, 503)))
+        return fakes.FakeResponse("{}")
+
+
+def run_calls(client: LLMClient, model, calls: int, threads: int = 8):
+    """(succeeded, unavailable, seconds)"""
+    def one(_):
+        try:
+            client.call(model.generate_content, "prompt")
+            return True
+        except (LLMUnavailable, ProviderError):
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, range(calls)))
+    return sum(results), len(results) - sum(results), time.perf_counter() - start
+
+
+def shared_bucket_process(args):
+    db_path, rate, calls = args
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": 30})
+    client = LLMClient(limiter=SharedTokenBucket(engine, "bench", rate, 1), max_wait=60)
+    start = time.perf_counter()
+    for _ in range(calls):
+        client.call(lambda: None)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"== transient errors ({args.error_rate:.0%} of attempts fail) ==")
+    for label, retries in (("no retries", 0), ("3 retries", 3)):
+        client = LLMClient(max_retries=retries, backoff_base=0.02, backoff_max=0.2)
+        model = FlakyModel(0.01, args.error_rate)
+        ok, failed, seconds = run_calls(client, model, args.calls)
+        print(f"{label:<12} {ok}/{args.calls} succeeded, {model.calls} provider calls, {seconds:.2f}s")
+
+    print("\n== outage (each call hangs 0.5s, then 503) ==")
+    calls = 40
+    for label, breaker in (("no breaker", CircuitBreaker(0, 0)), ("breaker", CircuitBreaker(5, 30))):
+        client = LLMClient(breaker=breaker, max_retries=3, backoff_base=0.05, backoff_max=0.2)
+        model = FlakyModel(0.01, hang=0.5)
+        ok, failed, seconds = run_calls(client, model, calls)
+        print(f"{label:<12} {failed}/{calls} failed in {seconds:5.2f}s, {model.calls} provider calls, "
+              f"breaker {client.stats()['breaker_state']}")
+
+    print("\n== rate limit (20/s, burst 5) ==")
+    client = LLMClient(limiter=TokenBucket(20, 5), max_wait=60)
+    ok, _, seconds = run_calls(client, FlakyModel(0.0), 60, threads=16)
+    stats = client.stats()
+    print(f"threads      {ok / seconds:5.1f} calls/s, {stats['throttled_calls']} throttled "
+          f"for {stats['throttled_seconds']:.1f}s in total")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "limits.db")
+        engine = create_engine(f"sqlite:///{db_path}")
+        migrations.migrate(engine)
+        engine.dispose()
+        processes, per_process = 4, 15
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            pool.map(shared_bucket_process, [(db_path, 20, per_process)] * processes)
+        seconds = time.perf_counter() - start
+        print(f"processes    {processes * per_process / seconds:5.1f} calls/s across {processes} processes "
+              f"sharing the database bucket")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""End-to-end candidate load against one or more checkouts of the backend.
+
+Starts each app with serve_fake.py (the fake LLM backend with a fixed
+latency and optional error injection) on a fresh SQLite database, creates
+one job, then runs N simulated candidates at once. Each registers, gets a
+token, starts the assessment, fetches the questions, submits every answer,
+completes and reads the leaderboard. Reports p50/p95/p99 latency and
+throughput per endpoint.
+
+With --minted-tokens candidates are inserted straight into the database
+and given minted tokens instead, so bcrypt doesn't dominate the run. With
+--batch all answers go in one POST /assessments/{id}/submissions:batch.
+
+To compare the async request path with the sync one, check out an older
+revision next to this one and pass both directories:
+
+    git worktree add /tmp/sync-app <sync-revision>
+    python benchmarks/bench_load.py --app-dir /tmp/sync-app/backend --app-dir .
+
+Usage: python benchmarks/bench_load.py [--app-dir DIR ...] [--candidates 500] [--latency 0.5]
+                                      [--error-rate 0.0] [--minted-tokens] [--batch]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+import httpx
+from jose import jwt
+from passlib.context import CryptContext
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SECRET_KEY = "benchmark"
+
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] * 1000 if values else 0.0
+
+
+def start_server(app_dir: str, workdir: str, port: int, latency: float, error_rate: float = 0.0,
+                 **overrides: str) -> subprocess.Popen:
+    env = dict(os.environ, **overrides,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load.db')}",
+               SECRET_KEY=SECRET_KEY, GEMINI_API_KEY="benchmark",
+               LLM_CACHE_ENABLED="false", GRADING_CACHE_PATH="",
+               TASK_POLL_INTERVAL_SECONDS="0.2")
+    # cwd is the scratch dir so a developer's .env isn't picked up
+    return subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "serve_fake.py"), "--app-dir",
+                             os.path.abspath(app_dir), "--port", str(port), "--latency", str(latency),
+                             "--error-rate", str(error_rate)],
+                            cwd=workdir, env=env)
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def create_job(client: httpx.AsyncClient) -> int:
+    await client.post("/register", json={"email": "recruiter@example.com", "password": "pw",
+                                         "full_name": "Recruiter", "role": "recruiter"})
+    token = (await client.post("/token", data={"username": "recruiter@example.com",
+                                               "password": "pw"})).json()["access_token"]
+    response = await client.post("/jobs", headers={"Authorization": f"Bearer {token}"},
+                                 json={"title": "Data Analyst", "description": "SQL and reporting"})
+    job_id = response.json()["id"]
+    # Newer versions generate questions in the background
+    for _ in range(600):
+        status = await client.get(f"/jobs/{job_id}/status")
+        if status.status_code == 404 or status.json()["status"] != "generating":
+            return job_id
+        await asyncio.sleep(0.1)
+    raise RuntimeError("question generation did not finish")
+
+
+def add_candidates(db_path: str, count: int):
+    hashed = CryptContext(schemes=["bcrypt"]).hash("pw")
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.executemany(
+        "INSERT INTO users (email, hashed_password, full_name, role, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(f"candidate{i}@example.com", hashed, f"Candidate {i}", "candidate", datetime.utcnow().isoformat(" "))
+         for i in range(count)]
+    )
+    conn.commit()
+    conn.close()
+    return [jwt.encode({"sub": f"candidate{i}@example.com"}, SECRET_KEY, algorithm="HS256") for i in range(count)]
+
+
+async def candidate(client: httpx.AsyncClient, token: Optional[str], job_id: int, index: int, timings, errors,
+                    batch: bool = False):
+    """One candidate's whole flow; without a minted token it registers and logs in first"""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    async def call(name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            errors[name] += 1
+            if errors[name] == 1:
+                print(f"  first {name} error: {type(e).__name__} {e}")
+            return None
+        timings[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[name] += 1
+            if errors[name] == 1:
+                print(f"  first {name} error: {response.status_code} {response.text[:200]}")
+            return None
+        return response.json()
+
+    if not token:
+        email = f"candidate{index}@example.com"
+        if not await call("register", "POST", "/register", json={
+            "email": email, "password": "pw", "full_name": f"Candidate {index}", "role": "candidate"
+        }):
+            return
+        login = await call("token", "POST", "/token", data={"username": email, "password": "pw"})
+        if not login:
+            return
+        headers["Authorization"] = f"Bearer {login['access_token']}"
+
+    assessment = await call("start", "POST", "/assessments", json={"job_id": job_id, "resume_url": f"https://example.com/cv/{index}.pdf"})
+    if not assessment:
+        return
+    questions = await call("questions", "GET", f"/assessments/{assessment['id']}/questions") or []
+    answers = []
+    for q in questions:
+        answer = {"question_id": q["id"], "answer": None, "selected_option": None, "code_submission": None}
+        if q["question_type"] == "mcq":
+            answer["selected_option"] = "A" if (index + q["id"]) % 3 else "B"
+        elif q["question_type"] == "coding":
+            answer["code_submission"] = f"def main(x):\n    # candidate {index}\n    return x + {q['id'] % 3}"
+        else:
+            answer["answer"] = f"Candidate {index} would start with question {q['id']} by checking the data."
+        answers.append((q["question_type"], answer))
+    if batch:
+        await call("submit:batch", "POST", f"/assessments/{assessment['id']}/submissions:batch",
+                   json={"submissions": [answer for _, answer in answers]})
+    else:
+        for question_type, answer in answers:
+            await call(f"submit:{question_type}", "POST", f"/assessments/{assessment['id']}/submit", json=answer)
+    await call("complete", "POST", f"/assessments/{assessment['id']}/complete")
+    await call("leaderboard", "GET", f"/jobs/{job_id}/leaderboard", params={"limit": 10})
+
+
+async def run(app_dir: str, candidates: int, latency: float, port: int, batch: bool = False,
+              error_rate: float = 0.0, minted_tokens: bool = False):
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(app_dir, workdir, port, latency, error_rate)
+        limits = httpx.Limits(max_connections=candidates, max_keepalive_connections=candidates)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=600, limits=limits) as client:
+                await wait_until_up(client)
+                job_id = await create_job(client)
+                if minted_tokens:
+                    tokens = add_candidates(os.path.join(workdir, "load.db"), candidates)
+                else:
+                    tokens = [None] * candidates
+
+                timings, errors = defaultdict(list), defaultdict(int)
+                start = time.perf_counter()
+                await asyncio.gather(*(candidate(client, token, job_id, i, timings, errors, batch)
+                                       for i, token in enumerate(tokens)))
+                elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+    requests = sum(len(v) for v in timings.values())
+    print(f"\n{os.path.abspath(app_dir)}")
+    print(f"  {candidates} candidates in {elapsed:.1f}s  ({candidates / elapsed:.1f} candidates/s, "
+          f"{requests / elapsed:.0f} requests/s, {sum(errors.values())} errors)")
+    for name in sorted(timings):
+        values = timings[name]
+        print(f"  {name:<18} n={len(values):<6} {len(values) / elapsed:7.1f} req/s  "
+              f"p50={statistics.median(values) * 1000:8.1f}ms  "
+              f"p95={percentile(values, 0.95):8.1f}ms  p99={percentile(values, 0.99):8.1f}ms  "
+              f"errors={errors[name]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-dir", action="append", help="backend directory to serve (repeatable)")
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake LLM calls that fail")
+    parser.add_argument("--minted-tokens", action="store_true",
+                        help="insert candidates directly instead of calling /register and /token")
+    parser.add_argument("--batch", action="store_true", help="submit all answers in one submissions:batch call")
+    args = parser.parse_args()
+
+    for app_dir in args.app_dir or [os.path.dirname(BENCH_DIR)]:
+        asyncio.run(run(app_dir, args.candidates, args.latency, args.port, args.batch,
+                        args.error_rate, args.minted_tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Plagiarism lookup: TF-IDF index vs MinHash/LSH, recall and latency by cohort size.
+
+Seeds an in-memory SQLite database with synthetic code submissions for one
+question, a share of which are lightly edited copies of earlier ones. Ground
+truth is the exact brute-force TF-IDF comparison; recall is the share of true
+matches (similarity > 70%) that each backend reports.
+
+Usage: python benchmarks/bench_plagiarism.py [--sizes 1000 5000 20000] [--queries 50]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assessment_utils import PlagiarismDetector
+from database import Base
+from models import Submission
+
+TEMPLATES = [
+    "def {f}({a}, {b}):\n    {t} = {a} {op} {b}\n    if {t} > {n}:\n        return {t} - {n}\n    return {t}\n",
+    "def {f}({a}):\n    {t} = []\n    for {b} in range({a}):\n        if {b} % {n} == 0:\n            {t}.append({b} {op} {n})\n    return {t}\n",
+    "def {f}({a}, {b}):\n    {t} = {{}}\n    for item in {a}:\n        {t}[item] = {t}.get(item, 0) {op} {n}\n    return sorted({t}, key={b})\n",
+    "class {f}:\n    def __init__(self, {a}):\n        self.{t} = {a}\n    def run(self, {b}):\n        return [x {op} {n} for x in self.{t} if x > {b}]\n",
+    "def {f}({a}):\n    {b}, {t} = 0, len({a}) - 1\n    while {b} < {t}:\n        if {a}[{b}] {op} {a}[{t}] > {n}:\n            {t} -= 1\n        else:\n            {b} += 1\n    return {b}\n",
+]
+STEMS = ["value", "total", "count", "items", "result", "index", "buffer", "node", "score",
+         "left", "right", "data", "acc", "memo", "cache", "queue", "stack", "graph", "path", "seen"]
+SUFFIXES = ["", "s", "_list", "_map", "_idx", "_tmp", "_out", "_in", "_sum", "_max", "_min", "_set"]
+WORDS = [stem + suffix for stem in STEMS for suffix in SUFFIXES]
+
+
+def random_solution(rng: random.Random) -> str:
+    names = rng.sample(WORDS, 4)
+    body = rng.choice(TEMPLATES).format(f=f"solve_{names[0]}", a=names[1], b=names[2], t=names[3],
+                                        n=rng.randint(2, 999), op=rng.choice("+-*"))
+    # Pad with a couple of unrelated helpers so submissions aren't tiny
+    helpers = "".join(rng.choice(TEMPLATES).format(
+        f=f"helper_{rng.choice(WORDS)}_{i}", a=rng.choice(WORDS), b=rng.choice(WORDS),
+        t=rng.choice(WORDS), n=rng.randint(2, 999), op=rng.choice("+-*")) for i in range(2))
+    return body + "\n" + helpers
+
+
+def mutate(code: str, rng: random.Random) -> str:
+    """A plagiarised copy: a renamed variable and an extra comment"""
+    old, new = rng.choice(WORDS), rng.choice(WORDS)
+    return "# my solution\n" + code.replace(old, new, 1)
+
+
+def seed(db, size: int, rng: random.Random, duplicate_rate: float = 0.1):
+    texts = []
+    for _ in range(size):
+        if texts and rng.random() < duplicate_rate:
+            texts.append(mutate(rng.choice(texts), rng))
+        else:
+            texts.append(random_solution(rng))
+    return texts
+
+
+def run(size: int, queries: int, seed_value: int):
+    rng = random.Random(seed_value)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    tfidf = PlagiarismDetector(backend="tfidf", rebuild_every=size * 2)
+    minhash = PlagiarismDetector(backend="minhash")
+
+    texts = seed(db, size, rng)
+    start = time.perf_counter()
+    for text in texts:
+        submission = Submission(assessment_id=1, question_id=1, code_submission=text)
+        db.add(submission)
+        db.flush()
+        minhash.record_submission(db, submission, text)
+    db.commit()
+    index_seconds = time.perf_counter() - start
+
+    # Warm the TF-IDF index once, as a long-running API process would have it
+    tfidf.check_submission(db, 1, texts[0])
+
+    probes = [mutate(rng.choice(texts), rng) if rng.random() < 0.5 else random_solution(rng)
+              for _ in range(queries)]
+    latencies = {"tfidf": [], "minhash": []}
+    found = {"tfidf": 0, "minhash": 0}
+    truth_total = 0
+    for probe in probes:
+        truth = {m["submission_id"] for m in
+                 tfidf.check_against_database(probe, texts, list(range(1, size + 1)))["similar_submissions"]}
+        truth_total += len(truth)
+        for name, detector in (("tfidf", tfidf), ("minhash", minhash)):
+            start = time.perf_counter()
+            result = detector.check_submission(db, 1, probe)
+            latencies[name].append(time.perf_counter() - start)
+            found[name] += len(truth & {m["submission_id"] for m in result["similar_submissions"]})
+
+    db.close()
+    print(f"\ncohort={size}  queries={queries}  true matches={truth_total}  "
+          f"minhash indexing={index_seconds / size * 1000:.2f}ms/submission")
+    for name in ("tfidf", "minhash"):
+        recall = found[name] / truth_total if truth_total else 1.0
+        p50 = statistics.median(latencies[name]) * 1000
+        p95 = sorted(latencies[name])[int(len(latencies[name]) * 0.95) - 1] * 1000
+        print(f"  {name:<8} recall={recall:6.1%}  p50={p50:7.2f}ms  p95={p95:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
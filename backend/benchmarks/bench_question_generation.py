@@ -0,0 +1,54 @@
+"""Question generation latency: sequential prompts vs concurrent fan-out.
+
+Usage: python benchmarks/bench_question_generation.py [--latency 0.5] [--runs 3]
+"""
+import argparse
+import asyncio
+import time
+
+from fakes import FakeModel
+from gemini_service import GeminiService
+
+JOB_DATA = {
+    "required_skills": ["Python", "SQL", "FastAPI"],
+    "experience_level": "Mid-level",
+    "role_type": "Backend Developer",
+    "key_responsibilities": ["Build APIs", "Design schemas"],
+    "tools_technologies": ["PostgreSQL", "Docker"],
+}
+
+
+def sequential(service: GeminiService):
+    """The pre-concurrency behaviour: one blocking call per category"""
+    for method, prompt, builder, count in service._question_batches(JOB_DATA, 10, 5, 3):
+        builder(service._generate(method, prompt), count)
+
+
+def timed(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    service = GeminiService(model=FakeModel(latency=args.latency), timeout=args.latency * 10)
+
+    results = {
+        "sequential": timed(lambda: sequential(service), args.runs),
+        "generate_questions (threads)": timed(lambda: service.generate_questions(JOB_DATA), args.runs),
+        "agenerate_questions (asyncio)": timed(lambda: asyncio.run(service.agenerate_questions(JOB_DATA)), args.runs),
+    }
+
+    print(f"fake LLM latency: {args.latency:.3f}s per call, 3 calls per job")
+    for name, seconds in results.items():
+        print(f"{name:<32} {seconds:.3f}s per job")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""GET /assessments/{id}/questions with and without the question payload cache.
+
+Seeds one job with candidates on a throwaway SQLite database and times the
+endpoint through the ASGI app, first with the cache disabled and then with
+it enabled. Also checks that the payload never carries answer keys and that
+editing a question is visible on the next request.
+
+Usage: python benchmarks/bench_questions.py [--questions 30] [--requests 2000]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+# Point the app at a scratch database before anything imports settings
+_workdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'questions.db')}"
+os.environ["LLM_CACHE_PATH"] = ""
+os.environ["GRADING_CACHE_PATH"] = ""
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from auth import create_access_token
+from database import SessionLocal
+from main import app
+from models import Assessment, Job, Question, User
+from question_cache import question_cache
+
+CANDIDATES = 50
+
+
+def seed(questions: int):
+    db = SessionLocal()
+    job = Job(title="Backend Developer", description="...", generation_status="ready")
+    db.add(job)
+    db.flush()
+    db.execute(insert(Question), [{
+        "job_id": job.id, "question_type": ("mcq", "subjective", "coding")[i % 3],
+        "question_text": f"Question {i}: " + "explain the trade-offs " * 20, "difficulty": "medium",
+        "skill_tested": "Python", "options": ["A) one", "B) two", "C) three", "D) four"] if i % 3 == 0 else None,
+        "correct_answer": "A" if i % 3 == 0 else None,
+        "test_cases": [{"input": [i], "expected_output": i}] if i % 3 == 2 else None,
+        "starter_code": "def main(x):\n    pass\n" if i % 3 == 2 else None, "max_score": 10.0
+    } for i in range(questions)])
+    assessments = []
+    for c in range(CANDIDATES):
+        user = User(email=f"candidate{c}@example.com", full_name=f"Candidate {c}", role="candidate")
+        db.add(user)
+        db.flush()
+        assessment = Assessment(job_id=job.id, candidate_id=user.id, status="in_progress")
+        db.add(assessment)
+        db.flush()
+        assessments.append((assessment.id, create_access_token({"sub": user.email})))
+    db.commit()
+    job_id = job.id
+    db.close()
+    return job_id, assessments
+
+
+def timed(client: TestClient, assessments, requests: int):
+    timings = []
+    for i in range(requests):
+        assessment_id, token = assessments[i % len(assessments)]
+        start = time.perf_counter()
+        response = client.get(f"/assessments/{assessment_id}/questions",
+                              headers={"Authorization": f"Bearer {token}"})
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(len(timings) * 0.99) - 1] * 1000, response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    job_id, assessments = seed(args.questions)
+    with TestClient(app) as client:
+        question_cache.enabled = False
+        p50, p99, uncached = timed(client, assessments, args.requests)
+        print(f"uncached  p50={p50:7.3f}ms  p99={p99:7.3f}ms")
+
+        question_cache.enabled = True
+        p50, p99, cached = timed(client, assessments, args.requests)
+        print(f"cached    p50={p50:7.3f}ms  p99={p99:7.3f}ms  {question_cache.stats()}")
+
+        assert cached == uncached, "cached payload differs from a fresh one"
+        assert all("correct_answer" not in q and "test_cases" not in q for q in cached)
+
+        # An ORM edit must be visible on the next request
+        db = SessionLocal()
+        question = db.query(Question).filter(Question.job_id == job_id).first()
+        question.question_text = "Edited"
+        db.commit()
+        db.close()
+        _, _, edited = timed(client, assessments, 1)
+        assert edited[0]["question_text"] == "Edited", "stale payload after an edit"
+    print("OK: payloads match, no answer keys, edits invalidate the cache")
+
+
+if __name__ == "__main__":
+    main()
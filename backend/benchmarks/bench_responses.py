@@ -0,0 +1,136 @@
+"""Requests per second for the leaderboard and question list, by response path.
+
+Serves the app (see serve_fake.py) once per configuration on a seeded SQLite
+database: the default encoder, FAST_JSON_RESPONSES, and FAST_JSON_RESPONSES
+with gzip. Each endpoint is then hit by concurrent clients for a fixed time.
+
+Usage: python benchmarks/bench_responses.py [--seconds 10] [--concurrency 32] [--clients 4] [--entries 100]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+import httpx
+from jose import jwt
+from sqlalchemy import create_engine, insert
+
+from bench_load import SECRET_KEY, start_server, wait_until_up
+from models import Assessment, Job, LeaderboardRecord, Question, User
+
+CONFIGS = {
+    "default": {"FAST_JSON_RESPONSES": "false", "GZIP_MINIMUM_SIZE": "0"},
+    "fast": {"FAST_JSON_RESPONSES": "true", "GZIP_MINIMUM_SIZE": "0"},
+    "fast+gzip": {"FAST_JSON_RESPONSES": "true", "GZIP_MINIMUM_SIZE": "1000"},
+}
+
+
+def seed(db_path: str, questions: int, entries: int) -> str:
+    """One job with questions and a full leaderboard; returns a candidate token"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Job), [{"id": 1, "title": "Backend Developer", "description": "...",
+                                    "generation_status": "ready"}])
+        conn.execute(insert(Question), [{
+            "job_id": 1, "question_type": ("mcq", "subjective", "coding")[i % 3],
+            "question_text": f"Question {i}: " + "describe how you would approach this " * 10,
+            "difficulty": "medium", "skill_tested": "Python",
+            "options": ["A) one", "B) two", "C) three", "D) four"] if i % 3 == 0 else None,
+            "correct_answer": "A" if i % 3 == 0 else None,
+            "starter_code": "def main(x):\n    pass\n" if i % 3 == 2 else None, "max_score": 10.0
+        } for i in range(questions)])
+        conn.execute(insert(User), [{"id": i, "email": f"c{i}@example.com", "full_name": f"Candidate {i}",
+                                     "role": "candidate"} for i in range(1, entries + 1)])
+        conn.execute(insert(Assessment), [{"id": i, "job_id": 1, "candidate_id": i, "status": "completed"}
+                                          for i in range(1, entries + 1)])
+        conn.execute(insert(LeaderboardRecord), [{
+            "job_id": 1, "assessment_id": i, "candidate_id": i, "candidate_name": f"Candidate {i}",
+            "total_score": float(i % 97), "percentage": float(i % 97),
+            "skill_scores": {"Python": float(i % 10), "SQL": float(i % 7), "APIs": float(i % 5)},
+            "completed_at": start + timedelta(seconds=i)
+        } for i in range(1, entries + 1)])
+    engine.dispose()
+    return jwt.encode({"sub": "c1@example.com"}, SECRET_KEY, algorithm="HS256")
+
+
+async def hammer(base_url: str, url: str, headers: dict, seconds: float, concurrency: int):
+    done, size = 0, 0
+    client = httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=concurrency), timeout=60)
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal done, size
+        while time.perf_counter() < deadline:
+            response = await client.get(url, headers=headers)
+            response.raise_for_status()
+            done += 1
+            size = int(response.headers.get("content-length", len(response.content)))
+
+    async with client:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done, size
+
+
+def client_process(args):
+    return asyncio.run(hammer(*args))
+
+
+def measure(pool, base_url: str, url: str, headers: dict, seconds: float, processes: int, concurrency: int):
+    """Requests per second and response size, with the load spread over client processes
+    so the client doesn't become the bottleneck"""
+    start = time.perf_counter()
+    results = pool.map(client_process, [(base_url, url, headers, seconds, concurrency // processes)] * processes)
+    return sum(done for done, _ in results) / (time.perf_counter() - start), results[0][1]
+
+
+async def wait_for(base_url: str):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        await wait_until_up(client)
+
+
+def run(overrides: dict, args) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), workdir,
+                              args.port, 0.0, **overrides)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_for(base_url))
+            token = seed(os.path.join(workdir, "load.db"), args.questions, args.entries)
+            headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}
+            results = {}
+            with multiprocessing.Pool(args.clients) as pool:
+                for label, url in (("leaderboard", f"/jobs/1/leaderboard?limit={args.entries}"),
+                                   ("questions", "/assessments/1/questions")):
+                    measure(pool, base_url, url, headers, 1, args.clients, args.concurrency)  # warm up
+                    results[label] = measure(pool, base_url, url, headers, args.seconds,
+                                             args.clients, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--entries", type=int, default=100, help="leaderboard entries per page")
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--clients", type=int, default=4, help="client processes")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} concurrent clients, {args.seconds:g}s per endpoint")
+    for name, overrides in CONFIGS.items():
+        results = run(overrides, args)
+        print(f"{name:<10} " + "  ".join(f"{label} {rps:7.0f} req/s ({size} B)"
+                                          for label, (rps, size) in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Query-count regression check for POST /assessments/{id}/complete.
+
+Completes assessments with different numbers of questions against a
+throwaway SQLite database and counts the SQL statements the endpoint issues.
+The count must not grow with the number of questions and must stay within
+MAX_STATEMENTS; the script exits non-zero otherwise.
+
+Usage: python benchmarks/check_query_count.py [--questions 5 50 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# Point the app at a scratch database before anything imports settings
+_workdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'check.db')}"
+os.environ["LLM_CACHE_PATH"] = ""
+os.environ["GRADING_CACHE_PATH"] = ""
+
+import fakes  # noqa: F401  (sets up sys.path and settings)
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from auth import create_access_token
+from database import SessionLocal, async_engine, engine
+from main import app
+from models import Assessment, Job, Question, Submission, User
+
+# Raise deliberately, with the reason in the commit, when the endpoint
+# legitimately needs another statement
+MAX_STATEMENTS = 12  # the completion claim UPDATE took the place of the rank snapshot COUNT
+
+SKILLS = ["Python", "SQL", "APIs", "Testing"]
+TYPES = ["mcq", "subjective", "coding"]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+        self.active = False
+        # Requests run on the async engine; helpers may still use the sync one
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.statements.append(statement)
+
+
+def seed(questions: int, candidates: int = 2):
+    """A ready job with the given number of questions and submitted assessments"""
+    db = SessionLocal()
+    job = Job(title=f"Job with {questions} questions", description="...", generation_status="ready")
+    db.add(job)
+    db.flush()
+    db.execute(insert(Question), [{
+        "job_id": job.id, "question_type": TYPES[i % len(TYPES)], "question_text": f"q{i}",
+        "difficulty": "easy", "skill_tested": SKILLS[i % len(SKILLS)], "max_score": 10.0
+    } for i in range(questions)])
+    question_ids = [q.id for q in db.query(Question.id).filter(Question.job_id == job.id)]
+
+    tokens = []
+    for c in range(candidates):
+        email = f"candidate{job.id}-{c}@example.com"
+        user = User(email=email, full_name=f"Candidate {c}", role="candidate")
+        db.add(user)
+        db.flush()
+        assessment = Assessment(job_id=job.id, candidate_id=user.id, status="in_progress",
+                                max_possible_score=questions * 10.0)
+        db.add(assessment)
+        db.flush()
+        db.execute(insert(Submission), [{
+            "assessment_id": assessment.id, "question_id": qid, "score": float((qid + c) % 11),
+            "selected_option": "A", "plagiarism_score": 0.0
+        } for qid in question_ids])
+        tokens.append((assessment.id, create_access_token({"sub": email})))
+    db.commit()
+    db.close()
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, nargs="+", default=[5, 50, 200])
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    counter = StatementCounter()
+
+    counts = {}
+    for questions in args.questions:
+        (warm_id, warm_token), (assessment_id, token) = seed(questions)
+        # The job's first completion also creates its score distribution
+        client.post(f"/assessments/{warm_id}/complete", headers={"Authorization": f"Bearer {warm_token}"})
+
+        counter.statements, counter.active = [], True
+        response = client.post(f"/assessments/{assessment_id}/complete",
+                               headers={"Authorization": f"Bearer {token}"})
+        counter.active = False
+        if response.status_code != 200:
+            print(f"questions={questions}: unexpected {response.status_code} {response.text}")
+            return 1
+        counts[questions] = len(counter.statements)
+        print(f"questions={questions:<5} statements={counts[questions]}")
+
+    failed = False
+    if len(set(counts.values())) > 1:
+        print("FAIL: statement count grows with the number of questions")
+        failed = True
+    if max(counts.values()) > MAX_STATEMENTS:
+        print(f"FAIL: more than {MAX_STATEMENTS} statements")
+        print("\n".join(counter.statements))
+        failed = True
+    if not failed:
+        print(f"OK: at most {MAX_STATEMENTS} statements")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""Stand-ins for external services used by the benchmarks"""
+import asyncio
+import os
+import sys
+import time
+
+# Benchmarks are run as scripts from backend/, make the app modules importable
+# and give Settings the values it requires without a real .env
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+# Measure the app, not the provider quota
+os.environ.setdefault("LLM_RATE_LIMIT_PER_MINUTE", "0")
+
+from fake_llm import FakeGenerativeModel, FakeResponse  # noqa: E402
+
+
+class FakeModel:
+    """Mimics genai.GenerativeModel with a fixed latency per call"""
+
+    def __init__(self, latency: float = 0.5, text: str = "[]"):
+        self.latency = latency
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        self.calls += 1
+        time.sleep(self.latency)
+        return FakeResponse(self.text)
+
+    async def generate_content_async(self, prompt: str) -> FakeResponse:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return FakeResponse(self.text)
+
+
+# The app's fake backend (LLM_BACKEND=fake). It recognises each prompt by its
+# opening instruction, so it also stands in for Gemini in older checkouts.
+ScriptedModel = FakeGenerativeModel
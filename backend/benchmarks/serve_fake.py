@@ -0,0 +1,35 @@
+"""Serve an app checkout with the scripted fake LLM in place of Gemini.
+
+Used by bench_load.py so the same load can be replayed against different
+versions of the backend. Configure the app through the environment as
+usual (DATABASE_URL etc.).
+
+Usage: python benchmarks/serve_fake.py --app-dir ../backend --port 8765 [--latency 0.5] [--error-rate 0.0]
+"""
+import argparse
+import os
+import sys
+
+from fakes import ScriptedModel
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-dir", required=True, help="backend directory of the checkout to serve")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake LLM calls that fail")
+    args = parser.parse_args()
+
+    # The checkout under test wins over the tree this script lives in
+    sys.path.insert(0, os.path.abspath(args.app_dir))
+    import uvicorn
+    import gemini_service
+    gemini_service.gemini_service.model = ScriptedModel(latency=args.latency, error_rate=args.error_rate)
+    import main as app_main
+
+    uvicorn.run(app_main.app, host="127.0.0.1", port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
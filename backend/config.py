@@ -1,12 +1,98 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: Optional[str] = None  # required with LLM_BACKEND=gemini
     DATABASE_URL: str = "sqlite:///./assessment.db"
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60  # 0 disables caching of resolved users
+    AUTH_USER_CACHE_ENTRIES: int = 10000
+    QUESTION_CACHE_TTL_SECONDS: int = 300  # 0 disables the per-job question payload cache
+    QUESTION_CACHE_ENTRIES: int = 1000
+    GEMINI_MODEL: str = "gemini-pro"
+    GEMINI_TIMEOUT_SECONDS: float = 30.0
+
+    # LLM backend: gemini, or fake for local runs and load tests (see fake_llm.py)
+    LLM_BACKEND: str = "gemini"
+    LLM_FAKE_LATENCY_SECONDS: float = 0.5
+    LLM_FAKE_ERROR_RATE: float = 0.0  # share of calls failing with a retryable provider error
+    LLM_FAKE_SEED: int = 0
+
+    # Database engine profile: auto (from DATABASE_URL), sqlite, postgres or default
+    DB_ENGINE_PROFILE: str = "auto"
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # safe with WAL; FULL also syncs on every commit
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # how long a writer waits for the lock
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # Postgres only
+
+    # Response encoding
+    FAST_JSON_RESPONSES: bool = False  # orjson / pydantic-core dumps instead of jsonable_encoder
+    GZIP_MINIMUM_SIZE: int = 0  # bytes; responses at least this large are gzipped, 0 disables
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "./llm_cache.db"  # empty for memory-only
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MEMORY_ENTRIES: int = 512
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # LLM provider limits, shared by every model call of the process
+    LLM_RATE_LIMIT_PER_MINUTE: int = 60  # 0 disables rate limiting
+    LLM_RATE_LIMIT_BURST: int = 10
+    LLM_RATE_LIMIT_SHARED: bool = False  # keep the bucket in the database, shared by all worker processes
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0  # longer waits fail with 503 / retry the task instead
+    LLM_MAX_RETRIES: int = 3  # for timeouts, 429 and 5xx responses
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 8.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failed attempts before failing fast, 0 disables
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # how long the breaker stays open before a probe call
+
+    # Background task workers
+    TASK_WORKERS: int = 2
+    TASK_POLL_INTERVAL_SECONDS: float = 1.0
+    TASK_MAX_ATTEMPTS: int = 3
+    TASK_STALE_AFTER_SECONDS: int = 600
+
+    # Plagiarism detection
+    PLAGIARISM_REBUILD_EVERY: int = 500  # appends before the TF-IDF vocabulary is refitted
+    PLAGIARISM_MAX_INDEXES: int = 256  # per-question indexes kept in memory
+    PLAGIARISM_BACKEND: str = "tfidf"  # tfidf or minhash
+    MINHASH_NUM_PERM: int = 128
+    MINHASH_BANDS: int = 32
+    MINHASH_MAX_CANDIDATES: int = 100  # exact re-scoring budget per lookup
+
+    # Code execution sandbox
+    SANDBOX_POOL_SIZE: int = 0  # 0 = one worker per CPU core
+    SANDBOX_MAX_RUNS: int = 50  # submissions before a worker is recycled
+    SANDBOX_MEMORY_LIMIT_MB: int = 512  # 0 disables the limit (always off on Windows)
+
+    # Coding submission grading
+    GRADING_WORKERS_PER_CORE: float = 1.0  # submissions graded concurrently per CPU core
+    GRADING_QUEUE_SIZE: int = 32  # submissions allowed to wait before answering 429
+    GRADING_TIME_BUDGET_SECONDS: float = 30.0  # total per submission
+    GRADING_MAX_PARALLEL_CASES: int = 4  # test cases of one submission run side by side
+    GRADING_CACHE_ENABLED: bool = True
+    GRADING_CACHE_PATH: str = "./grading_cache.db"  # empty for memory-only
+    GRADING_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    GRADING_CACHE_MEMORY_ENTRIES: int = 1024
+    GRADING_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Subjective answer grading
+    SUBJECTIVE_GRADING_MODE: str = "immediate"  # immediate: on submit; deferred: one batch at completion
+    SUBJECTIVE_BATCH_SIZE: int = 10  # answers graded per LLM call
+    SUBJECTIVE_BATCH_TOKEN_BUDGET: int = 6000  # estimated prompt tokens per LLM call
+
+    # Results
+    PERCENTILE_REFRESH_TOLERANCE: float = 0.05  # share of the cohort that may change before a percentile is recomputed
     
     class Config:
         env_file = ".env"
@@ -1,16 +1,95 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import get_settings
 
 settings = get_settings()
 
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+def engine_profile(url: str, profile: Optional[str] = None) -> str:
+    """sqlite, postgres or default; "auto" picks from the URL scheme"""
+    profile = (profile or settings.DB_ENGINE_PROFILE).lower()
+    if profile != "auto":
+        return profile
+    if url.startswith("sqlite"):
+        return "sqlite"
+    if url.startswith(("postgresql", "postgres")):
+        return "postgres"
+    return "default"
+
+def async_url(url: str) -> str:
+    """The async-driver form of a database URL: aiosqlite for SQLite, asyncpg for Postgres"""
+    parsed = make_url(url)
+    drivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+    backend = parsed.get_backend_name()
+    if backend in drivers and parsed.drivername in ("sqlite", "postgresql", "postgres", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername=drivers[backend])
+    return parsed.render_as_string(hide_password=False)
+
+def engine_options(url: str, profile: Optional[str] = None, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine keyword arguments for a profile"""
+    profile = engine_profile(url, profile)
+    pool = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS
+    }
+    if profile == "sqlite":
+        options = {"connect_args": {"check_same_thread": False,
+                                    "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        # In-memory databases use a single shared connection, not a queue pool
+        if url not in ("sqlite://", "sqlite:///:memory:"):
+            options.update(pool)
+            if is_async:
+                # aiosqlite defaults to NullPool, which would redo the pragmas per request
+                options["poolclass"] = AsyncAdaptedQueuePool
+        return options
+    if profile == "postgres":
+        return {
+            **pool,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            # libpq takes server settings as startup options, asyncpg as a dict
+            "connect_args": {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+            if is_async else {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+        }
+    return {"connect_args": {"check_same_thread": False}} if url.startswith("sqlite") else {}
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # Per connection: WAL lets readers run alongside the single writer, and a
+    # busy timeout makes writers queue instead of failing with "database is locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+def build_engine(url: str, profile: Optional[str] = None) -> Engine:
+    new_engine = create_engine(url, **engine_options(url, profile))
+    if engine_profile(url, profile) == "sqlite":
+        event.listen(new_engine, "connect", _sqlite_pragmas)
+    return new_engine
+
+def build_async_engine(url: str, profile: Optional[str] = None) -> AsyncEngine:
+    """Async engine for the request path; ``url`` is the sync URL"""
+    new_engine = create_async_engine(async_url(url), **engine_options(url, profile, is_async=True))
+    if engine_profile(url, profile) == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _sqlite_pragmas)
+    return new_engine
+
+# The sync engine serves background workers, migrations and scripts; API
+# requests go through the async engine
+engine = build_engine(settings.DATABASE_URL)
+async_engine = build_async_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False,
+                                       expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -20,3 +99,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
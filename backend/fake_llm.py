@@ -0,0 +1,125 @@
+"""Local stand-in for the Gemini model, selected with LLM_BACKEND=fake.
+
+Answers every GeminiService prompt with schema-valid JSON after a
+configurable latency, and fails a configurable share of calls with a
+retryable provider error. Responses are derived from the prompt, so the
+same prompt always gets the same answer. Lets the whole service run and be
+load tested without an API key or network access.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List
+
+# Skills recognised in a job description; anything else parses as these defaults
+KNOWN_SKILLS = ["Python", "SQL", "JavaScript", "Java", "React", "AWS", "Docker", "Kubernetes",
+                "Machine Learning", "Excel", "Communication"]
+DEFAULT_SKILLS = ["SQL", "Communication"]
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeProviderError(Exception):
+    """Injected failure; carries an HTTP status like google.api_core errors do"""
+
+    def __init__(self, code: int):
+        super().__init__(f"Fake provider error {code}")
+        self.code = code
+
+class FakeGenerativeModel:
+    """Mimics genai.GenerativeModel's generate_content and generate_content_async"""
+
+    def __init__(self, latency: float = 0.5, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, **kwargs) -> FakeResponse:
+        self._start_call()
+        time.sleep(self.latency)
+        return FakeResponse(self.respond(prompt))
+
+    async def generate_content_async(self, prompt: str, **kwargs) -> FakeResponse:
+        self._start_call()
+        await asyncio.sleep(self.latency)
+        return FakeResponse(self.respond(prompt))
+
+    def _start_call(self):
+        with self._lock:
+            self.calls += 1
+            failed = self.error_rate and self._rng.random() < self.error_rate
+        if failed:
+            raise FakeProviderError(self._rng.choice((429, 500, 503)))
+
+    # ==================== RESPONSES ====================
+
+    @staticmethod
+    def _count(prompt: str, default: int) -> int:
+        match = re.search(r"Generate (\d+)", prompt)
+        return int(match.group(1)) if match else default
+
+    @staticmethod
+    def _skills(prompt: str) -> List[str]:
+        match = re.search(r"^Skills: (.*)$", prompt, re.MULTILINE)
+        skills = [s.strip() for s in match.group(1).split(",") if s.strip()] if match else []
+        return skills or DEFAULT_SKILLS
+
+    @staticmethod
+    def _score(answer: str, max_score: float) -> float:
+        """Between 30% and 100% of max_score, stable for the same answer"""
+        share = 0.3 + 0.7 * (zlib.crc32((answer or "").encode()) % 1000) / 999
+        return round(max_score * share, 1)
+
+    def respond(self, prompt: str) -> str:
+        if "Analyze this job description" in prompt:
+            description = prompt.split("Job Description:", 1)[-1].lower()
+            skills = [s for s in KNOWN_SKILLS if s.lower() in description] or DEFAULT_SKILLS
+            return json.dumps({"required_skills": skills, "experience_level": "Mid-level",
+                               "role_type": "Engineer", "domain_knowledge": [],
+                               "key_responsibilities": ["Delivery", "Collaboration"],
+                               "tools_technologies": skills})
+        if "multiple choice" in prompt:
+            skills = self._skills(prompt)
+            return json.dumps([{"question_text": f"Which statement about {skills[i % len(skills)]} is true? ({i + 1})",
+                                "options": ["A) First", "B) Second", "C) Third", "D) Fourth"],
+                                "correct_answer": "ABCD"[i % 4], "difficulty": ("easy", "medium", "hard")[i % 3],
+                                "skill_tested": skills[i % len(skills)]}
+                               for i in range(self._count(prompt, 10))])
+        if "subjective/scenario" in prompt:
+            skills = self._skills(prompt)
+            return json.dumps([{"question_text": f"Describe how you would use {skills[i % len(skills)]} "
+                                                 f"to handle scenario {i + 1}.",
+                                "difficulty": "medium", "skill_tested": skills[i % len(skills)]}
+                               for i in range(self._count(prompt, 5))])
+        if "coding problems" in prompt:
+            return json.dumps([{"question_text": f"Return x plus {i}.", "difficulty": "easy",
+                                "skill_tested": "Python", "starter_code": "def main(x):\n    pass",
+                                "test_cases": [{"input": str(n), "expected_output": str(n + i)} for n in (1, 5)]}
+                               for i in range(self._count(prompt, 3))])
+        if "Evaluate these answers" in prompt:
+            items = json.loads(prompt.split("Answers (JSON):", 1)[1].split("\n\nReturn", 1)[0])
+            return json.dumps([self._grading(item["answer"], item["max_score"], id=item["id"]) for item in items])
+        if "Evaluate this answer" in prompt:
+            answer = re.search(r"^Answer: (.*)$", prompt, re.MULTILINE)
+            max_score = re.search(r"^Maximum Score: ([\d.]+)$", prompt, re.MULTILINE)
+            return json.dumps(self._grading(answer.group(1) if answer else "",
+                                            float(max_score.group(1)) if max_score else 10.0))
+        if "evaluation report" in prompt:
+            return json.dumps({"strengths": ["Consistent answers", "Clear reasoning"],
+                               "weaknesses": ["Speed under time pressure"], "skill_gaps": [],
+                               "ai_summary": "Solid performance across the assessed skills.",
+                               "recommendation": "Maybe - strong fundamentals, verify depth in interview"})
+        if "mismatch" in prompt:
+            return json.dumps({"is_suspicious": False, "mismatch_details": [], "confidence_score": 0})
+        return "{}"
+
+    def _grading(self, answer: str, max_score: float, **extra: Any) -> Dict[str, Any]:
+        return {**extra, "score": self._score(answer, max_score), "feedback": "Reasonable answer.",
+                "strengths": ["Relevant"], "weaknesses": []}
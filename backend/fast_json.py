@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Any, Optional, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from config import get_settings
+
+settings = get_settings()
+
+# With FAST_JSON_RESPONSES, plain-dict routes are rendered with orjson
+default_response_class: Type[Response] = ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+
+@lru_cache(maxsize=None)
+def adapter_for(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def encode(response_type: Any, value: Any, response: Optional[Response] = None) -> Any:
+    """A route's return value for ``response_type``.
+
+    By default ``value`` is handed back for FastAPI to validate against the
+    route's response_model and encode. With FAST_JSON_RESPONSES it is
+    validated once (from attributes, so ORM objects work) and dumped to JSON
+    by pydantic-core, skipping jsonable_encoder and json.dumps. Headers set on
+    ``response`` are carried over since FastAPI drops them for a returned
+    Response.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return value
+    adapter = adapter_for(response_type)
+    body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    return Response(content=body, media_type="application/json",
+                    headers=dict(response.headers) if response is not None else None)
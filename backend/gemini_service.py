@@ -1,18 +1,124 @@
-import google.generativeai as genai
 from config import get_settings
+import asyncio
 import json
-from typing import List, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional, Tuple
+from llm_client import LLMClient, LLMUnavailable, llm_client
+from response_cache import LRUCache, SQLiteCache, TieredCache, make_key
 
 settings = get_settings()
-genai.configure(api_key=settings.GEMINI_API_KEY)
+
+def build_model(model_name: str):
+    """The configured LLM backend's model; the Gemini SDK is only imported when it's used"""
+    backend = settings.LLM_BACKEND.lower()
+    if backend == "fake":
+        from fake_llm import FakeGenerativeModel
+        return FakeGenerativeModel(latency=settings.LLM_FAKE_LATENCY_SECONDS,
+                                   error_rate=settings.LLM_FAKE_ERROR_RATE, seed=settings.LLM_FAKE_SEED)
+    if backend != "gemini":
+        raise ValueError(f"Unknown LLM_BACKEND: {settings.LLM_BACKEND}")
+    if not settings.GEMINI_API_KEY:
+        raise RuntimeError("GEMINI_API_KEY is required with LLM_BACKEND=gemini")
+    import google.generativeai as genai
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai.GenerativeModel(model_name)
+
+def default_model_name() -> str:
+    # Fake responses are cached under their own name, never as Gemini's
+    return settings.GEMINI_MODEL if settings.LLM_BACKEND.lower() == "gemini" else settings.LLM_BACKEND.lower()
+
+def build_response_cache() -> Optional[TieredCache]:
+    """Response cache configured from settings, or None when disabled"""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    memory = LRUCache(max_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+                      ttl_seconds=settings.LLM_CACHE_TTL_SECONDS)
+    disk = None
+    if settings.LLM_CACHE_PATH:
+        disk = SQLiteCache(settings.LLM_CACHE_PATH, table="llm_responses",
+                           ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                           max_bytes=settings.LLM_CACHE_MAX_BYTES)
+    return TieredCache(memory, disk)
 
 class GeminiService:
-    def __init__(self):
-        self.model = genai.GenerativeModel('gemini-pro')
-    
-    def parse_job_description(self, jd_text: str) -> Dict[str, Any]:
-        """Parse job description and extract key information"""
-        prompt = f"""
+    def __init__(self, model=None, timeout: Optional[float] = None, cache=None,
+                 model_name: Optional[str] = None, client: Optional[LLMClient] = None):
+        self.model_name = model_name or default_model_name()
+        self.model = model or build_model(self.model_name)
+        self.timeout = timeout if timeout is not None else settings.GEMINI_TIMEOUT_SECONDS
+        self.cache = cache
+        # Rate limit, retries and circuit breaker; shared by every instance by default
+        self.client = client or llm_client
+
+    # ==================== MODEL CALLS ====================
+
+    def _parse_json(self, text: str) -> Any:
+        """Strip markdown fences from a model response and parse it as JSON"""
+        text = text.strip()
+        if text.startswith('```json'):
+            text = text[7:]
+        if text.startswith('```'):
+            text = text[3:]
+        if text.endswith('```'):
+            text = text[:-3]
+        return json.loads(text.strip())
+
+    def _cache_key(self, method: str, prompt: str) -> str:
+        # Whitespace differences in the prompt template shouldn't split the cache
+        return make_key(self.model_name, method, " ".join(prompt.split()))
+
+    def _cached(self, method: str, prompt: str, use_cache: bool) -> Optional[str]:
+        if self.cache is None or not use_cache:
+            return None
+        return self.cache.get(self._cache_key(method, prompt))
+
+    def _store(self, method: str, prompt: str, text: str, use_cache: bool):
+        """Cache a response, but only if it parses - fallbacks must not stick"""
+        if self.cache is None or not use_cache:
+            return
+        try:
+            self._parse_json(text)
+        except ValueError:
+            return
+        self.cache.set(self._cache_key(method, prompt), text)
+
+    def _generate(self, method: str, prompt: str, use_cache: bool = True) -> str:
+        """Blocking model call bounded by the per-call timeout, returns the raw response text.
+
+        Raises LLMUnavailable when the provider can't be used right now.
+        """
+        text = self._cached(method, prompt, use_cache)
+        if text is not None:
+            return text
+        response = self.client.call(self.model.generate_content, prompt, timeout=self.timeout)
+        self._store(method, prompt, response.text, use_cache)
+        return response.text
+
+    async def _agenerate(self, method: str, prompt: str, use_cache: bool = True) -> str:
+        """Non-blocking model call bounded by the per-call timeout.
+
+        The response cache has a SQLite tier, so it is read and written on a
+        worker thread rather than on the event loop.
+        """
+        text = await asyncio.to_thread(self._cached, method, prompt, use_cache)
+        if text is not None:
+            return text
+
+        def call():
+            if hasattr(self.model, "generate_content_async"):
+                return self.model.generate_content_async(prompt)
+            return asyncio.to_thread(self.model.generate_content, prompt)
+
+        response = await self.client.acall(call, timeout=self.timeout)
+        await asyncio.to_thread(self._store, method, prompt, response.text, use_cache)
+        return response.text
+
+    # ==================== PROMPTS ====================
+
+    def _job_description_prompt(self, jd_text: str) -> str:
+        return f"""
 Analyze this job description and extract the following information in JSON format:
 - required_skills: List of technical and soft skills (array)
 - experience_level: Fresher, Junior, Mid-level, Senior, or Expert
@@ -26,36 +132,9 @@ Job Description:
 
 Return ONLY valid JSON without any markdown formatting or extra text.
 """
-        
-        response = self.model.generate_content(prompt)
-        try:
-            # Clean response and parse JSON
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            return json.loads(text.strip())
-        except:
-            return {
-                "required_skills": [],
-                "experience_level": "Mid-level",
-                "role_type": "General",
-                "domain_knowledge": [],
-                "key_responsibilities": [],
-                "tools_technologies": []
-            }
-    
-    def generate_questions(self, job_data: Dict[str, Any], num_mcq: int = 10, 
-                          num_subjective: int = 5, num_coding: int = 3) -> List[Dict[str, Any]]:
-        """Generate assessment questions based on job requirements"""
-        
-        questions = []
-        
-        # Generate MCQ questions
-        mcq_prompt = f"""
+
+    def _mcq_prompt(self, job_data: Dict[str, Any], num_mcq: int) -> str:
+        return f"""
 Generate {num_mcq} multiple choice questions for assessing candidates for this role:
 Skills: {', '.join(job_data.get('required_skills', []))}
 Experience: {job_data.get('experience_level', 'Mid-level')}
@@ -70,33 +149,9 @@ For each question, provide:
 
 Return as JSON array without markdown formatting.
 """
-        
-        try:
-            response = self.model.generate_content(mcq_prompt)
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            mcq_questions = json.loads(text.strip())
-            
-            for q in mcq_questions[:num_mcq]:
-                questions.append({
-                    "question_type": "mcq",
-                    "question_text": q.get("question_text", ""),
-                    "options": q.get("options", []),
-                    "correct_answer": q.get("correct_answer", "A"),
-                    "difficulty": q.get("difficulty", "medium"),
-                    "skill_tested": q.get("skill_tested", "general"),
-                    "max_score": 10 if q.get("difficulty") == "hard" else 5 if q.get("difficulty") == "medium" else 3
-                })
-        except Exception as e:
-            print(f"Error generating MCQ: {e}")
-        
-        # Generate subjective questions
-        subj_prompt = f"""
+
+    def _subjective_prompt(self, job_data: Dict[str, Any], num_subjective: int) -> str:
+        return f"""
 Generate {num_subjective} subjective/scenario-based questions for this role:
 Skills: {', '.join(job_data.get('required_skills', []))}
 Responsibilities: {', '.join(job_data.get('key_responsibilities', [])[:3])}
@@ -108,33 +163,9 @@ For each question:
 
 Return as JSON array without markdown formatting.
 """
-        
-        try:
-            response = self.model.generate_content(subj_prompt)
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            subj_questions = json.loads(text.strip())
-            
-            for q in subj_questions[:num_subjective]:
-                questions.append({
-                    "question_type": "subjective",
-                    "question_text": q.get("question_text", ""),
-                    "difficulty": q.get("difficulty", "medium"),
-                    "skill_tested": q.get("skill_tested", "analytical"),
-                    "max_score": 20 if q.get("difficulty") == "hard" else 15 if q.get("difficulty") == "medium" else 10
-                })
-        except Exception as e:
-            print(f"Error generating subjective: {e}")
-        
-        # Generate coding questions
-        if num_coding > 0 and any(tech in str(job_data.get('required_skills', [])).lower() 
-                                  for tech in ['python', 'java', 'javascript', 'programming', 'code']):
-            coding_prompt = f"""
+
+    def _coding_prompt(self, job_data: Dict[str, Any], num_coding: int) -> str:
+        return f"""
 Generate {num_coding} coding problems for this role:
 Skills: {', '.join(job_data.get('required_skills', []))}
 Technologies: {', '.join(job_data.get('tools_technologies', []))}
@@ -144,41 +175,13 @@ For each problem:
 - difficulty: easy, medium, or hard
 - skill_tested: Which programming skill
 - starter_code: Basic function template
-- test_cases: Array of {"input": "...", "expected_output": "..."}
+- test_cases: Array of {{"input": "...", "expected_output": "..."}}
 
 Return as JSON array without markdown formatting.
 """
-            
-            try:
-                response = self.model.generate_content(coding_prompt)
-                text = response.text.strip()
-                if text.startswith('```json'):
-                    text = text[7:]
-                if text.startswith('```'):
-                    text = text[3:]
-                if text.endswith('```'):
-                    text = text[:-3]
-                coding_questions = json.loads(text.strip())
-                
-                for q in coding_questions[:num_coding]:
-                    questions.append({
-                        "question_type": "coding",
-                        "question_text": q.get("question_text", ""),
-                        "difficulty": q.get("difficulty", "medium"),
-                        "skill_tested": q.get("skill_tested", "programming"),
-                        "starter_code": q.get("starter_code", ""),
-                        "test_cases": q.get("test_cases", []),
-                        "max_score": 30 if q.get("difficulty") == "hard" else 20 if q.get("difficulty") == "medium" else 15
-                    })
-            except Exception as e:
-                print(f"Error generating coding: {e}")
-        
-        return questions
-    
-    def evaluate_subjective_answer(self, question: str, answer: str, 
-                                   max_score: float) -> Dict[str, Any]:
-        """Evaluate subjective answer using AI"""
-        prompt = f"""
+
+    def _subjective_evaluation_prompt(self, question: str, answer: str, max_score: float) -> str:
+        return f"""
 Evaluate this answer to a subjective question:
 
 Question: {question}
@@ -193,28 +196,25 @@ Provide evaluation in JSON format:
 
 Return ONLY valid JSON without markdown formatting.
 """
-        
-        response = self.model.generate_content(prompt)
-        try:
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            return json.loads(text.strip())
-        except:
-            return {
-                "score": max_score * 0.5,
-                "feedback": "Unable to evaluate automatically.",
-                "strengths": [],
-                "weaknesses": []
-            }
-    
-    def generate_evaluation_report(self, assessment_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate comprehensive evaluation report"""
-        prompt = f"""
+
+    def _subjective_batch_prompt(self, items: List[Dict[str, Any]]) -> str:
+        return f"""
+Evaluate these answers to subjective questions. Grade each answer on its own.
+
+Answers (JSON): {json.dumps(items, indent=2)}
+
+Return a JSON array with one object per answer:
+- id: The id of the answer being graded
+- score: Number between 0 and that answer's max_score
+- feedback: Detailed feedback (2-3 sentences)
+- strengths: What was good (array)
+- weaknesses: What could be improved (array)
+
+Return ONLY valid JSON without markdown formatting.
+"""
+
+    def _evaluation_report_prompt(self, assessment_data: Dict[str, Any]) -> str:
+        return f"""
 Generate a comprehensive evaluation report for this candidate:
 
 Assessment Data:
@@ -229,18 +229,66 @@ Provide analysis in JSON format:
 
 Return ONLY valid JSON without markdown formatting.
 """
-        
-        response = self.model.generate_content(prompt)
+
+    # ==================== RESPONSE HANDLING ====================
+
+    def _job_description_result(self, text: str) -> Dict[str, Any]:
         try:
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            return json.loads(text.strip())
+            return self._parse_json(text)
         except:
+            return {
+                "required_skills": [],
+                "experience_level": "Mid-level",
+                "role_type": "General",
+                "domain_knowledge": [],
+                "key_responsibilities": [],
+                "tools_technologies": []
+            }
+
+    def _subjective_evaluation_result(self, text: str, max_score: float) -> Dict[str, Any]:
+        try:
+            return self._parse_json(text)
+        except:
+            return {
+                "score": max_score * 0.5,
+                "feedback": "Unable to evaluate automatically.",
+                "strengths": [],
+                "weaknesses": []
+            }
+
+    def _subjective_batch_results(self, text: str, items: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Valid gradings from a batch response by item id; anything malformed is left out"""
+        try:
+            parsed = self._parse_json(text)
+        except ValueError:
+            return {}
+        if not isinstance(parsed, list):
+            return {}
+
+        max_scores = {item["id"]: item["max_score"] for item in items}
+        results = {}
+        for entry in parsed:
+            if not isinstance(entry, dict) or entry.get("id") not in max_scores:
+                continue
+            score = entry.get("score")
+            if isinstance(score, bool) or not isinstance(score, (int, float)):
+                continue
+            if not 0 <= score <= max_scores[entry["id"]] or not isinstance(entry.get("feedback"), str):
+                continue
+            results[entry["id"]] = {
+                "score": float(score),
+                "feedback": entry["feedback"],
+                "strengths": entry.get("strengths") or [],
+                "weaknesses": entry.get("weaknesses") or []
+            }
+        return results
+
+    def _evaluation_report_result(self, text: str, fallback: bool = True) -> Dict[str, Any]:
+        try:
+            return self._parse_json(text)
+        except:
+            if not fallback:
+                raise
             return {
                 "strengths": ["Completed assessment"],
                 "weaknesses": ["Needs more practice"],
@@ -248,9 +296,233 @@ Return ONLY valid JSON without markdown formatting.
                 "ai_summary": "Average performance.",
                 "recommendation": "Maybe - requires further evaluation"
             }
-    
-    def detect_resume_mismatch(self, resume_skills: List[str], 
-                               performance_data: Dict[str, float]) -> Dict[str, Any]:
+
+    def _wants_coding(self, job_data: Dict[str, Any], num_coding: int) -> bool:
+        return num_coding > 0 and any(tech in str(job_data.get('required_skills', [])).lower()
+                                      for tech in ['python', 'java', 'javascript', 'programming', 'code'])
+
+    def _mcq_questions(self, text: str, num_mcq: int) -> List[Dict[str, Any]]:
+        return [{
+            "question_type": "mcq",
+            "question_text": q.get("question_text", ""),
+            "options": q.get("options", []),
+            "correct_answer": q.get("correct_answer", "A"),
+            "difficulty": q.get("difficulty", "medium"),
+            "skill_tested": q.get("skill_tested", "general"),
+            "max_score": 10 if q.get("difficulty") == "hard" else 5 if q.get("difficulty") == "medium" else 3
+        } for q in self._parse_json(text)[:num_mcq]]
+
+    def _subjective_questions(self, text: str, num_subjective: int) -> List[Dict[str, Any]]:
+        return [{
+            "question_type": "subjective",
+            "question_text": q.get("question_text", ""),
+            "difficulty": q.get("difficulty", "medium"),
+            "skill_tested": q.get("skill_tested", "analytical"),
+            "max_score": 20 if q.get("difficulty") == "hard" else 15 if q.get("difficulty") == "medium" else 10
+        } for q in self._parse_json(text)[:num_subjective]]
+
+    def _coding_questions(self, text: str, num_coding: int) -> List[Dict[str, Any]]:
+        return [{
+            "question_type": "coding",
+            "question_text": q.get("question_text", ""),
+            "difficulty": q.get("difficulty", "medium"),
+            "skill_tested": q.get("skill_tested", "programming"),
+            "starter_code": q.get("starter_code", ""),
+            "test_cases": q.get("test_cases", []),
+            "max_score": 30 if q.get("difficulty") == "hard" else 20 if q.get("difficulty") == "medium" else 15
+        } for q in self._parse_json(text)[:num_coding]]
+
+    def _question_batches(self, job_data: Dict[str, Any], num_mcq: int,
+                          num_subjective: int, num_coding: int) -> List[tuple]:
+        """(method, prompt, builder, count) for every question category to generate"""
+        batches = [
+            ("generate_mcq", self._mcq_prompt(job_data, num_mcq), self._mcq_questions, num_mcq),
+            ("generate_subjective", self._subjective_prompt(job_data, num_subjective),
+             self._subjective_questions, num_subjective),
+        ]
+        if self._wants_coding(job_data, num_coding):
+            batches.append(("generate_coding", self._coding_prompt(job_data, num_coding),
+                            self._coding_questions, num_coding))
+        return batches
+
+    # ==================== PUBLIC API ====================
+
+    def parse_job_description(self, jd_text: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Parse job description and extract key information"""
+        text = self._generate("parse_job_description", self._job_description_prompt(jd_text), use_cache)
+        return self._job_description_result(text)
+
+    async def aparse_job_description(self, jd_text: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Async variant of parse_job_description"""
+        text = await self._agenerate("parse_job_description", self._job_description_prompt(jd_text), use_cache)
+        return self._job_description_result(text)
+
+    def generate_questions(self, job_data: Dict[str, Any], num_mcq: int = 10,
+                          num_subjective: int = 5, num_coding: int = 3,
+                          use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Generate assessment questions based on job requirements.
+
+        The MCQ, subjective and coding prompts are independent, so they are
+        issued in parallel threads; latency tracks the slowest call. A category
+        whose response doesn't parse is skipped, but one the provider didn't
+        answer in time raises, so a partial set is never returned.
+        """
+        batches = self._question_batches(job_data, num_mcq, num_subjective, num_coding)
+        questions = []
+
+        # Don't block on shutdown: a call that timed out must not hold up the job
+        pool = ThreadPoolExecutor(max_workers=len(batches))
+        try:
+            futures = [pool.submit(self._generate, method, prompt, use_cache)
+                       for method, prompt, _, _ in batches]
+            # Room for every retry the client may make, not just one attempt
+            deadline = time.monotonic() + self.client.budget(self.timeout)
+            for (method, _, builder, count), future in zip(batches, futures):
+                try:
+                    text = future.result(timeout=max(deadline - time.monotonic(), 0))
+                    questions.extend(builder(text, count))
+                except (LLMUnavailable, FutureTimeoutError):
+                    # A partial question set would be stored as if complete
+                    raise
+                except Exception as e:
+                    print(f"Error in {method}: {e!r}")
+        finally:
+            pool.shutdown(wait=False)
+
+        return questions
+
+    async def agenerate_questions(self, job_data: Dict[str, Any], num_mcq: int = 10,
+                                  num_subjective: int = 5, num_coding: int = 3,
+                                  use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Async variant of generate_questions, fanning the prompts out with asyncio"""
+        batches = self._question_batches(job_data, num_mcq, num_subjective, num_coding)
+        responses = await asyncio.gather(
+            *(self._agenerate(method, prompt, use_cache) for method, prompt, _, _ in batches),
+            return_exceptions=True
+        )
+
+        questions = []
+        for (method, _, builder, count), response in zip(batches, responses):
+            try:
+                if isinstance(response, BaseException):
+                    raise response
+                questions.extend(builder(response, count))
+            except LLMUnavailable:
+                raise
+            except Exception as e:
+                print(f"Error in {method}: {e!r}")
+
+        return questions
+
+    def evaluate_subjective_answer(self, question: str, answer: str,
+                                   max_score: float, use_cache: bool = True) -> Dict[str, Any]:
+        """Evaluate subjective answer using AI"""
+        prompt = self._subjective_evaluation_prompt(question, answer, max_score)
+        text = self._generate("evaluate_subjective_answer", prompt, use_cache)
+        return self._subjective_evaluation_result(text, max_score)
+
+    async def aevaluate_subjective_answer(self, question: str, answer: str,
+                                          max_score: float, use_cache: bool = True) -> Dict[str, Any]:
+        """Async variant of evaluate_subjective_answer"""
+        prompt = self._subjective_evaluation_prompt(question, answer, max_score)
+        text = await self._agenerate("evaluate_subjective_answer", prompt, use_cache)
+        return self._subjective_evaluation_result(text, max_score)
+
+    def _subjective_batches(self, answers: List[Tuple[str, str, float]]) -> List[List[Dict[str, Any]]]:
+        """Split answers into prompt-sized batches by count and estimated tokens"""
+        batches, batch, tokens = [], [], 0
+        for index, (question, answer, max_score) in enumerate(answers):
+            item = {"id": index, "question": question, "answer": answer or "", "max_score": max_score}
+            # Roughly four characters per token
+            item_tokens = (len(item["question"] or "") + len(item["answer"])) // 4 + 20
+            if batch and (len(batch) >= settings.SUBJECTIVE_BATCH_SIZE or
+                          tokens + item_tokens > settings.SUBJECTIVE_BATCH_TOKEN_BUDGET):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(item)
+            tokens += item_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def evaluate_subjective_batch(self, answers: List[Tuple[str, str, float]],
+                                  use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Grade (question, answer, max_score) triples, several per LLM call.
+
+        Results come back in input order. Items the batch response doesn't
+        grade validly are re-graded one at a time.
+        """
+        results = [None] * len(answers)
+        for batch in self._subjective_batches(answers):
+            try:
+                text = self._generate("evaluate_subjective_batch", self._subjective_batch_prompt(batch), use_cache)
+                graded = self._subjective_batch_results(text, batch)
+            except LLMUnavailable:
+                raise
+            except Exception as e:
+                print(f"Error in evaluate_subjective_batch: {e!r}")
+                graded = {}
+            for item in batch:
+                results[item["id"]] = graded.get(item["id"]) or self.evaluate_subjective_answer(
+                    item["question"], item["answer"], item["max_score"], use_cache
+                )
+        return results
+
+    async def aevaluate_subjective_batch(self, answers: List[Tuple[str, str, float]],
+                                         use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Async variant of evaluate_subjective_batch, sending the batches concurrently"""
+        batches = self._subjective_batches(answers)
+        responses = await asyncio.gather(
+            *(self._agenerate("evaluate_subjective_batch", self._subjective_batch_prompt(batch), use_cache)
+              for batch in batches),
+            return_exceptions=True
+        )
+
+        results = [None] * len(answers)
+        retries = []
+        for batch, response in zip(batches, responses):
+            if isinstance(response, LLMUnavailable):
+                raise response
+            if isinstance(response, BaseException):
+                print(f"Error in evaluate_subjective_batch: {response!r}")
+                graded = {}
+            else:
+                graded = self._subjective_batch_results(response, batch)
+            for item in batch:
+                if item["id"] in graded:
+                    results[item["id"]] = graded[item["id"]]
+                else:
+                    retries.append(item)
+
+        singles = await asyncio.gather(*(
+            self.aevaluate_subjective_answer(item["question"], item["answer"], item["max_score"], use_cache)
+            for item in retries
+        ))
+        for item, result in zip(retries, singles):
+            results[item["id"]] = result
+        return results
+
+    def generate_evaluation_report(self, assessment_data: Dict[str, Any],
+                                   use_cache: bool = True, fallback: bool = True) -> Dict[str, Any]:
+        """Generate comprehensive evaluation report.
+
+        With ``fallback=False`` an unparseable response raises instead of
+        returning the canned report, so a background task can retry it.
+        """
+        prompt = self._evaluation_report_prompt(assessment_data)
+        text = self._generate("generate_evaluation_report", prompt, use_cache)
+        return self._evaluation_report_result(text, fallback)
+
+    async def agenerate_evaluation_report(self, assessment_data: Dict[str, Any],
+                                          use_cache: bool = True, fallback: bool = True) -> Dict[str, Any]:
+        """Async variant of generate_evaluation_report"""
+        prompt = self._evaluation_report_prompt(assessment_data)
+        text = await self._agenerate("generate_evaluation_report", prompt, use_cache)
+        return self._evaluation_report_result(text, fallback)
+
+    def detect_resume_mismatch(self, resume_skills: List[str],
+                               performance_data: Dict[str, float],
+                               use_cache: bool = True) -> Dict[str, Any]:
         """Detect mismatch between resume claims and actual performance"""
         prompt = f"""
 Analyze if there's a mismatch between claimed skills and performance:
@@ -265,17 +537,10 @@ Return JSON with:
 
 Return ONLY valid JSON without markdown formatting.
 """
-        
-        response = self.model.generate_content(prompt)
+
+        text = self._generate("detect_resume_mismatch", prompt, use_cache)
         try:
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            return json.loads(text.strip())
+            return self._parse_json(text)
         except:
             return {
                 "is_suspicious": False,
@@ -284,4 +549,4 @@ Return ONLY valid JSON without markdown formatting.
             }
 
 # Create singleton instance
-gemini_service = GeminiService()
+gemini_service = GeminiService(cache=build_response_cache())
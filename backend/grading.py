@@ -0,0 +1,200 @@
+import ast
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from assessment_utils import CodeExecutor, code_executor
+from config import get_settings
+from response_cache import LRUCache, SQLiteCache, TieredCache, make_key
+
+settings = get_settings()
+
+def normalize_code(code: str) -> str:
+    """Canonical form of a submission: comments and formatting don't change the AST"""
+    try:
+        return ast.dump(ast.parse(code or ""), include_attributes=False)
+    except (SyntaxError, ValueError):
+        return (code or "").strip()
+
+def grading_cache_key(code: str, test_cases: List[Dict[str, Any]], timeout: int) -> str:
+    """Key on the normalized code, the test cases and the executor version.
+
+    Editing a question's test cases changes the key, so stale results are
+    never served; they simply age out of the cache.
+    """
+    return make_key(
+        make_key(normalize_code(code)),
+        make_key(test_cases or []),
+        CodeExecutor.VERSION,
+        timeout
+    )
+
+def build_grading_cache() -> Optional[TieredCache]:
+    if not settings.GRADING_CACHE_ENABLED:
+        return None
+    memory = LRUCache(max_entries=settings.GRADING_CACHE_MEMORY_ENTRIES,
+                      ttl_seconds=settings.GRADING_CACHE_TTL_SECONDS)
+    disk = None
+    if settings.GRADING_CACHE_PATH:
+        disk = SQLiteCache(settings.GRADING_CACHE_PATH, table="grading_results",
+                           ttl_seconds=settings.GRADING_CACHE_TTL_SECONDS,
+                           max_bytes=settings.GRADING_CACHE_MAX_BYTES)
+    return TieredCache(memory, disk)
+
+def _deterministic(result: Dict[str, Any]) -> bool:
+    """Timeouts, crashes and budget cut-offs depend on load, not on the code"""
+    transient = ("Code execution timed out", "Grading time budget exceeded", "Sandbox process crashed")
+    return not any(r.get("error") in transient for r in result["test_results"])
+
+class GradingQueueFull(Exception):
+    """Raised instead of queueing when the grader is saturated"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Grading queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class GradingScheduler:
+    """Bounded queue in front of the code executor.
+
+    At most ``concurrency`` submissions are graded at once and at most
+    ``max_queue`` more may wait; anything beyond that is rejected with
+    GradingQueueFull so API threads don't pile up behind the sandbox.
+    """
+
+    def __init__(self, executor: CodeExecutor = code_executor, concurrency: int = None,
+                 max_queue: int = None, time_budget: float = None, cache: TieredCache = None):
+        cores = os.cpu_count() or 1
+        self.executor = executor
+        self.concurrency = concurrency or max(1, int(cores * settings.GRADING_WORKERS_PER_CORE))
+        self.max_queue = max_queue if max_queue is not None else settings.GRADING_QUEUE_SIZE
+        self.time_budget = time_budget or settings.GRADING_TIME_BUDGET_SECONDS
+        self.cache = cache
+        self._threads = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="grader")
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self._counters = {"completed": 0, "rejected": 0}
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from recent run times"""
+        average_run = sum(self._run_times) / len(self._run_times) if self._run_times else 1.0
+        return max(1, math.ceil(average_run * (self._waiting + 1) / self.concurrency))
+
+    def submit(self, code: str, test_cases: List[Dict[str, Any]], timeout: int = 5,
+               on_case: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> Future:
+        """Queue a submission; ``on_case(index, result)`` is called on the grader
+        thread as each test case finishes"""
+        with self._lock:
+            if self._waiting + self._running >= self.concurrency + self.max_queue:
+                self._counters["rejected"] += 1
+                raise GradingQueueFull(self._retry_after())
+            self._waiting += 1
+        return self._threads.submit(self._run, code, test_cases, timeout, time.monotonic(), on_case)
+
+    def grade(self, code: str, test_cases: List[Dict[str, Any]], timeout: int = 5) -> Dict[str, Any]:
+        """Blocking helper: serve from the cache, or queue the submission and wait"""
+        key = grading_cache_key(code, test_cases, timeout) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        result = self.submit(code, test_cases, timeout).result()
+        if key is not None and _deterministic(result):
+            self.cache.set(key, result)
+        return result
+
+    async def agrade(self, code: str, test_cases: List[Dict[str, Any]], timeout: int = 5) -> Dict[str, Any]:
+        """Async variant of grade: drains stream() for the final result"""
+        async for event, data in await self.stream(code, test_cases, timeout):
+            if event == "result":
+                return data
+
+    async def stream(self, code: str, test_cases: List[Dict[str, Any]],
+                     timeout: int = 5) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Grade without holding a thread of the caller's, returning an async iterator
+        of ("case", {"index", **case result}) events in completion order followed
+        by one ("result", final result) event.
+
+        Admission happens here, before iteration starts, so GradingQueueFull is
+        raised by the awaited call itself. A cached result is replayed as events;
+        the cache lookup may hit disk, so it runs on a worker thread.
+        """
+        key = grading_cache_key(code, test_cases, timeout) if self.cache is not None else None
+        cached = await asyncio.to_thread(self.cache.get, key) if key is not None else None
+        if cached is not None:
+            return self._replay(cached)
+
+        loop = asyncio.get_running_loop()
+        events: "asyncio.Queue[Optional[Tuple[int, Dict[str, Any]]]]" = asyncio.Queue()
+        future = self.submit(code, test_cases, timeout,
+                             on_case=lambda index, result: loop.call_soon_threadsafe(
+                                 events.put_nowait, (index, result)))
+        if key is not None:
+            # Cached even if the caller stops listening, so its retry is free
+            future.add_done_callback(lambda f: self._cache_result(key, f))
+        # Queued after every case event, and also sent if grading raises midway
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+        return self._follow(future, events)
+
+    def _cache_result(self, key: str, future: Future):
+        if future.exception() is None and _deterministic(future.result()):
+            self.cache.set(key, future.result())
+
+    async def _replay(self, result: Dict[str, Any]):
+        for index, case in enumerate(result["test_results"]):
+            yield "case", {"index": index, **case}
+        yield "result", result
+
+    async def _follow(self, future: Future, events: asyncio.Queue):
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            index, case = event
+            yield "case", {"index": index, **case}
+        yield "result", future.result()
+
+    def _run(self, code: str, test_cases: List[Dict[str, Any]], timeout: int, enqueued_at: float,
+             on_case: Optional[Callable[[int, Dict[str, Any]], None]] = None):
+        started_at = time.monotonic()
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+            self._wait_times.append(started_at - enqueued_at)
+        try:
+            results = {}
+            for index, result in self.executor.iter_python_code(code, test_cases, timeout,
+                                                                deadline=started_at + self.time_budget):
+                results[index] = result
+                if on_case is not None:
+                    on_case(index, result)
+            return CodeExecutor.summarize([results[i] for i in range(len(results))])
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._counters["completed"] += 1
+                self._run_times.append(time.monotonic() - started_at)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._wait_times)
+            return {
+                "concurrency": self.concurrency,
+                "queue_capacity": self.max_queue,
+                "queue_depth": self._waiting,
+                "running": self._running,
+                "wait_ms_avg": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                "wait_ms_p95": waits[int(len(waits) * 0.95) - 1] * 1000 if len(waits) >= 20 else None,
+                "cache": self.cache.stats() if self.cache is not None else None,
+                **self._counters
+            }
+
+grading_scheduler = GradingScheduler(cache=build_grading_cache())
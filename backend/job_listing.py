@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from models import Job, JobSkill
+import pagination
+
+# Newest first; ties on created_at are broken by id so the order is total
+ORDER_BY = (Job.created_at.desc(), Job.id.desc())
+
+def normalize_skill(skill: str) -> str:
+    return " ".join(skill.split()).lower()
+
+def normalize_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    """Distinct normalized skills from a parsed required_skills list"""
+    return sorted({normalize_skill(s) for s in skills or () if isinstance(s, str) and s.strip()})
+
+def encode_cursor(job: Job) -> str:
+    return pagination.encode_cursor(job.created_at.isoformat(), job.id)
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a malformed cursor"""
+    return pagination.decode_cursor(cursor, datetime.fromisoformat, int)
+
+def replace_skills(db: Session, job_id: int, skills: Optional[Iterable[str]]):
+    """Rewrite a job's job_skills rows from its parsed required_skills"""
+    normalized = normalize_skills(skills)
+    db.execute(delete(JobSkill).where(JobSkill.job_id == job_id))
+    if normalized:
+        db.execute(insert(JobSkill), [{"job_id": job_id, "skill": s} for s in normalized])
+
+def page(db: Session, limit: int, cursor: Optional[str] = None,
+         skills: Iterable[str] = ()) -> Tuple[List[Job], Optional[str]]:
+    """One page of active jobs plus the cursor for the next page.
+
+    Jobs must have every skill in ``skills``. Each skill is an indexed
+    lookup in job_skills, and the cursor carries the sort key of the last
+    job served, so deep pages cost the same as the first.
+    """
+    query = select(Job).where(Job.is_active == True)
+    for skill in normalize_skills(skills):
+        query = query.where(Job.id.in_(select(JobSkill.job_id).where(JobSkill.skill == skill)))
+    if cursor:
+        created_at, job_id = decode_cursor(cursor)
+        query = query.where(Job.created_at <= created_at, or_(
+            Job.created_at < created_at,
+            and_(Job.created_at == created_at, Job.id < job_id)
+        ))
+
+    jobs, more = pagination.split_page(db.scalars(query.order_by(*ORDER_BY).limit(limit + 1)).all(), limit)
+    return jobs, encode_cursor(jobs[-1]) if more else None
@@ -0,0 +1,166 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import Assessment, Evaluation, LeaderboardRecord, ScoreDistribution
+import pagination
+
+settings = get_settings()
+
+# Leaderboard order, also used for keyset pagination. Ranks are positions in
+# this order, computed when read rather than stored on every row.
+ORDER_BY = (
+    LeaderboardRecord.total_score.desc(),
+    LeaderboardRecord.completed_at,
+    LeaderboardRecord.assessment_id
+)
+
+def encode_cursor(entry: LeaderboardRecord, rank: int) -> str:
+    return pagination.encode_cursor(entry.total_score, entry.completed_at.isoformat(), entry.assessment_id, rank)
+
+def decode_cursor(cursor: str) -> Tuple[float, datetime, int, int]:
+    """Raises ValueError for a malformed cursor"""
+    return pagination.decode_cursor(cursor, float, datetime.fromisoformat, int, int)
+
+def record_completion(db: Session, assessment: Assessment, candidate_name: str,
+                      skill_scores: Dict[str, float]):
+    """Upsert the leaderboard row for a completed assessment"""
+    entry = db.query(LeaderboardRecord).filter(
+        LeaderboardRecord.assessment_id == assessment.id
+    ).first()
+    if entry is None:
+        entry = LeaderboardRecord(assessment_id=assessment.id, job_id=assessment.job_id,
+                                  candidate_id=assessment.candidate_id)
+        db.add(entry)
+    entry.candidate_name = candidate_name
+    entry.total_score = assessment.total_score or 0
+    entry.percentage = assessment.percentage or 0
+    entry.skill_scores = skill_scores
+    entry.completed_at = assessment.completed_at or assessment.created_at
+
+def page(db: Session, job_id: int, limit: int,
+         cursor: Optional[str] = None) -> Tuple[List[Tuple[int, LeaderboardRecord]], Optional[str]]:
+    """One page of (rank, entry) pairs plus the cursor for the next page.
+
+    A single indexed range scan: the cursor carries the sort key and rank of
+    the last row served, so deep pages cost the same as the first.
+    """
+    query = db.query(LeaderboardRecord).filter(LeaderboardRecord.job_id == job_id)
+    rank = 0
+    if cursor:
+        score, completed_at, assessment_id, rank = decode_cursor(cursor)
+        # The plain bound lets the index seek straight to the cursor's score;
+        # the OR only refines rows within that tie group
+        query = query.filter(LeaderboardRecord.total_score <= score, or_(
+            LeaderboardRecord.total_score < score,
+            and_(LeaderboardRecord.total_score == score, LeaderboardRecord.completed_at > completed_at),
+            and_(LeaderboardRecord.total_score == score, LeaderboardRecord.completed_at == completed_at,
+                 LeaderboardRecord.assessment_id > assessment_id)
+        ))
+
+    entries, more = pagination.split_page(query.order_by(*ORDER_BY).limit(limit + 1).all(), limit)
+    ranked = [(rank + i, entry) for i, entry in enumerate(entries, 1)]
+    return ranked, encode_cursor(ranked[-1][1], ranked[-1][0]) if more else None
+
+# ==================== SCORE DISTRIBUTION ====================
+
+BUCKETS = 1001  # 0.0% .. 100.0% in steps of 0.1
+
+def _bucket(percentage: float) -> int:
+    return min(max(int(round((percentage or 0) * 10)), 0), BUCKETS - 1)
+
+class ScoreHistogram:
+    """Fenwick tree over percentage buckets: O(log B) insert and rank queries"""
+
+    def __init__(self, tree: Optional[List[int]] = None):
+        self.tree = list(tree) if tree else [0] * (BUCKETS + 1)
+
+    def add(self, percentage: float, count: int = 1):
+        i = _bucket(percentage) + 1
+        while i <= BUCKETS:
+            self.tree[i] += count
+            i += i & -i
+
+    def count_through(self, bucket: int) -> int:
+        """Entries in buckets 0..bucket inclusive"""
+        total, i = 0, bucket + 1
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def percentile(self, percentage: float, total: int) -> float:
+        """Share of the cohort scoring below, counting ties as half"""
+        if total <= 0:
+            return 0.0
+        bucket = _bucket(percentage)
+        below = self.count_through(bucket - 1) if bucket > 0 else 0
+        equal = self.count_through(bucket) - below
+        return (below + 0.5 * equal) / total * 100
+
+def _load_distribution(db: Session, job_id: int, exclude_assessment_id: int) -> ScoreDistribution:
+    """The job's distribution row, created from existing entries if missing.
+
+    FOR UPDATE locks the row on Postgres; SQLite ignores it, so callers must
+    already hold the write lock (see record_score).
+    """
+    distribution = db.query(ScoreDistribution).filter(
+        ScoreDistribution.job_id == job_id
+    ).with_for_update().first()
+    if distribution is not None:
+        return distribution
+
+    histogram = ScoreHistogram()
+    percentages = db.query(LeaderboardRecord.percentage).filter(
+        LeaderboardRecord.job_id == job_id,
+        LeaderboardRecord.assessment_id != exclude_assessment_id
+    ).all()
+    for (percentage,) in percentages:
+        histogram.add(percentage)
+    try:
+        with db.begin_nested():
+            distribution = ScoreDistribution(job_id=job_id, tree=histogram.tree, count=len(percentages))
+            db.add(distribution)
+    except IntegrityError:
+        # Another completion created it first
+        distribution = db.query(ScoreDistribution).filter(
+            ScoreDistribution.job_id == job_id
+        ).with_for_update().first()
+    return distribution
+
+def record_score(db: Session, assessment: Assessment) -> Tuple[float, int]:
+    """Add a completed assessment to its job's distribution.
+
+    Returns (percentile, distribution size) for the assessment. This is a
+    read-modify-write of the tree, so the transaction must have written
+    before it (complete_assessment claims the assessment first), otherwise
+    SQLite reads outside the write lock and concurrent updates are lost.
+    """
+    distribution = _load_distribution(db, assessment.job_id, assessment.id)
+    histogram = ScoreHistogram(distribution.tree)
+    histogram.add(assessment.percentage)
+    # Reassign rather than mutate so the JSON column is flagged dirty
+    distribution.tree = histogram.tree
+    distribution.count = (distribution.count or 0) + 1
+    return histogram.percentile(assessment.percentage, distribution.count), distribution.count
+
+def refresh_percentile(db: Session, evaluation: Evaluation, assessment: Assessment) -> bool:
+    """Recompute a stored percentile once the distribution has grown past the tolerance"""
+    distribution = db.query(ScoreDistribution).filter(
+        ScoreDistribution.job_id == assessment.job_id
+    ).first()
+    if distribution is None or not distribution.count:
+        return False
+
+    basis = evaluation.percentile_sample_size or 0
+    if abs(distribution.count - basis) <= settings.PERCENTILE_REFRESH_TOLERANCE * distribution.count:
+        return False
+
+    evaluation.percentile = ScoreHistogram(distribution.tree).percentile(assessment.percentage,
+                                                                          distribution.count)
+    evaluation.percentile_sample_size = distribution.count
+    return True
@@ -0,0 +1,332 @@
+"""Rate limiting, retries and a circuit breaker in front of the LLM provider.
+
+Every GeminiService model call goes through the ``llm_client`` singleton, so
+the limits hold across request handlers, background task workers and the
+question generation threads of a process. With LLM_RATE_LIMIT_SHARED the
+token bucket lives in the llm_rate_limits table and is shared by every
+process using the database.
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from config import get_settings
+from models import LLMRateLimit
+
+settings = get_settings()
+
+# HTTP statuses of google.api_core errors worth retrying: quota, overload, server faults
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling the provider when it is degraded, over quota or keeps failing"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_STATUS
+
+# ==================== RATE LIMITING ====================
+
+class TokenBucket:
+    """Thread-safe token bucket for one process.
+
+    ``reserve`` takes a token, possibly ahead of time, and returns how long
+    the caller has to wait before using it. A wait over ``max_wait`` takes
+    nothing, so the caller can give up without holding back later calls.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait <= max_wait:
+                self._tokens -= 1
+            return wait
+
+class SharedTokenBucket:
+    """TokenBucket kept in a llm_rate_limits row, shared by every process on the database.
+
+    A reservation is an UPDATE (refill and take a token) and a SELECT in one
+    transaction, so concurrent processes serialize on the row lock.
+    """
+
+    def __init__(self, engine: Engine, name: str, rate: float, capacity: float):
+        self.engine = engine
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+
+    def reserve(self, max_wait: float) -> float:
+        try:
+            return self._reserve(max_wait)
+        except IntegrityError:
+            # Another process created the row first
+            return self._reserve(max_wait)
+
+    def _reserve(self, max_wait: float) -> float:
+        bucket = LLMRateLimit.__table__
+        row = bucket.c.name == self.name
+        with self.engine.begin() as conn:
+            if conn.dialect.name == "sqlite":
+                # Take the write lock up front: under WAL a read transaction that
+                # later tries to write fails at once instead of waiting for the lock
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+            now = time.time()
+            refilled = bucket.c.tokens + (now - bucket.c.updated_at) * self.rate
+            taken = conn.execute(update(bucket).where(row).values(
+                tokens=case((refilled > self.capacity, self.capacity), else_=refilled) - 1,
+                updated_at=now
+            )).rowcount
+            if not taken:
+                conn.execute(insert(bucket).values(name=self.name, tokens=self.capacity - 1, updated_at=now))
+                return 0.0
+
+            tokens = conn.execute(select(bucket.c.tokens).where(row)).scalar_one()
+            wait = max(0.0, -tokens / self.rate)
+            if wait > max_wait:
+                conn.execute(update(bucket).where(row).values(tokens=bucket.c.tokens + 1))
+            return wait
+
+# ==================== CIRCUIT BREAKER ====================
+
+class CircuitBreaker:
+    """Fails calls fast while the provider is degraded.
+
+    Opens after ``threshold`` consecutive failed attempts and rejects calls
+    for ``reset_seconds``. Then it is half open: one probe call goes through,
+    closing the breaker if it succeeds and reopening it if it fails. A probe
+    that never reports back is replaced after another ``reset_seconds``.
+    A threshold of 0 never opens.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def check(self) -> Optional[float]:
+        """None if a call may go ahead, otherwise seconds until one might"""
+        with self._lock:
+            if self.state == "open":
+                remaining = self._opened_at + self.reset_seconds - time.monotonic()
+                if remaining > 0:
+                    return remaining
+                self.state = "half_open"
+                self._probe_started = None
+            if self.state == "half_open":
+                now = time.monotonic()
+                if self._probe_started is not None and now - self._probe_started < self.reset_seconds:
+                    return self._probe_started + self.reset_seconds - now
+                self._probe_started = now
+            return None
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.threshold and self.failures >= self.threshold):
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(self._opened_at + self.reset_seconds - time.monotonic(), 0.0)
+
+# ==================== CLIENT ====================
+
+class LLMClient:
+    """Runs provider calls through the rate limiter, retries and circuit breaker.
+
+    Retryable errors (timeouts, connection errors, 429 and 5xx responses) are
+    retried with full-jitter exponential backoff and count towards opening
+    the breaker. Other errors are raised at once: the provider answered, the
+    request itself was bad. Once the breaker is open, the rate limit wait
+    would be longer than ``max_wait`` or the retries are used up, calls raise
+    LLMUnavailable.
+    """
+
+    def __init__(self, limiter=None, breaker: Optional[CircuitBreaker] = None,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 max_wait: float = 10.0, fallback_limiter: Optional[TokenBucket] = None):
+        self.limiter = limiter
+        # Used when the shared limiter's database can't be reached
+        self.fallback_limiter = fallback_limiter
+        self.breaker = breaker or CircuitBreaker(0, 0)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counters = {"attempts": 0, "retries": 0, "retryable_errors": 0, "errors": 0,
+                          "rejected_open": 0, "rejected_throttled": 0, "throttled_calls": 0}
+        self._throttled_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "LLMClient":
+        limiter = fallback = None
+        if settings.LLM_RATE_LIMIT_PER_MINUTE > 0:
+            rate = settings.LLM_RATE_LIMIT_PER_MINUTE / 60
+            fallback = TokenBucket(rate, settings.LLM_RATE_LIMIT_BURST)
+            limiter = fallback
+            if settings.LLM_RATE_LIMIT_SHARED:
+                from database import engine
+                limiter = SharedTokenBucket(engine, settings.GEMINI_MODEL, rate, settings.LLM_RATE_LIMIT_BURST)
+        return cls(
+            limiter=limiter,
+            breaker=CircuitBreaker(settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS),
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base=settings.LLM_BACKOFF_BASE_SECONDS,
+            backoff_max=settings.LLM_BACKOFF_MAX_SECONDS,
+            max_wait=settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS,
+            fallback_limiter=fallback
+        )
+
+    def call(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """Blocking ``fn(*args)``; with a timeout it runs on a pool thread and is abandoned after it"""
+        for attempt in range(self.max_retries + 1):
+            self._admit()
+            time.sleep(self._reserve())
+            try:
+                result = self._run(fn, args, timeout)
+            except Exception as e:
+                time.sleep(self._failed(e, attempt))
+            else:
+                self.breaker.record_success()
+                return result
+
+    def budget(self, timeout: float) -> float:
+        """Longest a call with this per-attempt timeout can take: every attempt
+        waiting out the rate limit and timing out, plus the longest backoffs"""
+        backoff = sum(min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                      for attempt in range(self.max_retries))
+        return (self.max_retries + 1) * (timeout + self.max_wait) + backoff
+
+    async def acall(self, make_call: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Async counterpart of ``call``; ``make_call`` starts a fresh attempt each time it's called"""
+        for attempt in range(self.max_retries + 1):
+            self._admit()
+            if self.limiter is self.fallback_limiter:
+                wait = self._reserve()
+            else:
+                wait = await asyncio.to_thread(self._reserve)
+            await asyncio.sleep(wait)
+            try:
+                result = await asyncio.wait_for(make_call(), timeout=timeout)
+            except Exception as e:
+                await asyncio.sleep(self._failed(e, attempt))
+            else:
+                self.breaker.record_success()
+                return result
+
+    def _admit(self):
+        self._count("attempts")
+        blocked_for = self.breaker.check()
+        if blocked_for is not None:
+            self._count("rejected_open")
+            raise LLMUnavailable("LLM circuit breaker is open", retry_after=math.ceil(blocked_for))
+
+    def _reserve(self) -> float:
+        """Take a rate limit token, returning how long to wait for it"""
+        if self.limiter is None:
+            return 0.0
+        try:
+            wait = self.limiter.reserve(self.max_wait)
+        except SQLAlchemyError as e:
+            print(f"Error in llm rate limiter: {e!r}")
+            wait = self.fallback_limiter.reserve(self.max_wait)
+        if wait > self.max_wait:
+            self._count("rejected_throttled")
+            raise LLMUnavailable("LLM rate limit exceeded", retry_after=math.ceil(wait))
+        if wait > 0:
+            with self._lock:
+                self._counters["throttled_calls"] += 1
+                self._throttled_seconds += wait
+        return wait
+
+    def _run(self, fn: Callable[..., Any], args: tuple, timeout: Optional[float]) -> Any:
+        if timeout is None:
+            return fn(*args)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm")
+        future = self._pool.submit(fn, *args)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"LLM call timed out after {timeout}s")
+
+    def _failed(self, error: Exception, attempt: int) -> float:
+        """Re-raise a failed attempt's error, or return the backoff before the next attempt"""
+        if not is_retryable(error):
+            # The provider is up, the request itself was rejected
+            self._count("errors")
+            self.breaker.record_success()
+            raise error
+        self._count("retryable_errors")
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            retry_after = self.breaker.retry_after() or self.backoff_max
+            raise LLMUnavailable(f"LLM call failed after {attempt + 1} attempts: {error!r}",
+                                 retry_after=math.ceil(retry_after)) from error
+        self._count("retries")
+        # Full jitter keeps callers that failed together from retrying together
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            throttled_seconds = round(self._throttled_seconds, 3)
+        return {
+            **counters,
+            "throttled_seconds": throttled_seconds,
+            "breaker_state": self.breaker.state,
+            "breaker_failures": self.breaker.failures,
+            "breaker_opened": self.breaker.times_opened,
+            "rate_limit_shared": isinstance(self.limiter, SharedTokenBucket)
+        }
+
+llm_client = LLMClient.from_settings()
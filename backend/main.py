@@ -1,26 +1,46 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import time
+import numpy as np
 import uvicorn
 
-from database import engine, get_db, Base
+from database import engine, get_async_db, AsyncSessionLocal, SessionLocal
 from models import User, Job, Question, Assessment, Submission, Evaluation
 from schemas import *
-from auth import verify_password, get_password_hash, create_access_token, verify_token
+from auth import verify_password, get_password_hash, create_access_token, verify_token, UserSnapshot, user_cache
 from gemini_service import gemini_service
+from llm_client import LLMUnavailable, llm_client
 from assessment_utils import code_executor, plagiarism_detector, anomaly_detector
+from grading import grading_scheduler, GradingQueueFull
 from config import get_settings
+from task_queue import enqueue, task_pool
+from migrations import migrate
+from question_cache import candidate_questions_query, question_cache, serialize_questions
+import fast_json
+import job_listing
+import leaderboard
+import pipelines  # registers background task handlers
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="AI Assessment Platform", version="1.0.0")
+# Create or upgrade database tables
+migrate(engine)
 
 settings = get_settings()
 
+app = FastAPI(title="AI Assessment Platform", version="1.0.0",
+              default_response_class=fast_json.default_response_class)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,20 +48,52 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+if settings.GZIP_MINIMUM_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+@app.exception_handler(LLMUnavailable)
+async def llm_unavailable(request: Request, exc: LLMUnavailable):
+    # Nothing is stored, so the client can simply retry; never guess a score
+    print(f"Error in {request.url.path}: {exc!r}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "AI evaluation is temporarily unavailable, please retry"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.on_event("startup")
+def start_background_workers():
+    task_pool.start()
+    code_executor.pool.warm()
+    if plagiarism_detector.lsh is not None:
+        # Submissions stored while the tfidf backend was active have no LSH buckets yet
+        db = SessionLocal()
+        try:
+            plagiarism_detector.lsh.backfill(db)
+        finally:
+            db.close()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    task_pool.stop()
+    code_executor.pool.shutdown()
+
 # ==================== AUTH ROUTES ====================
 
 @app.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register new user"""
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    # bcrypt is deliberately slow; keep it off the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     new_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -49,15 +101,15 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         role=user.role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @app.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login and get access token"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -70,105 +122,127 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """Get current authenticated user"""
     payload = verify_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
     email = payload.get("sub")
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = user_cache.get(email)
+    if user is None:
+        started = time.perf_counter()
+        db_user = await db.scalar(select(User).where(User.email == email))
+        if not db_user:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = UserSnapshot.from_user(db_user)
+        user_cache.put(email, user, time.perf_counter() - started)
     return user
 
 # ==================== JOB ROUTES ====================
 
-@app.post("/jobs", response_model=JobResponse)
-def create_job(job: JobCreate, current_user: User = Depends(get_current_user), 
-               db: Session = Depends(get_db)):
-    """Create new job and parse JD with Gemini"""
+@app.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(job: JobCreate, current_user: UserSnapshot = Depends(get_current_user), 
+                     db: AsyncSession = Depends(get_async_db)):
+    """Create new job; JD parsing and question generation run in the background"""
     if current_user.role not in ["recruiter", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Parse JD using Gemini
-    jd_data = gemini_service.parse_job_description(job.description)
-    
-    # Create job
     new_job = Job(
         title=job.title,
         description=job.description,
         recruiter_id=current_user.id,
-        required_skills=jd_data.get("required_skills", []),
-        experience_level=jd_data.get("experience_level", "Mid-level"),
-        role_type=jd_data.get("role_type", "General"),
-        domain_knowledge=jd_data.get("domain_knowledge", []),
         duration_minutes=job.duration_minutes,
-        cutoff_percentage=job.cutoff_percentage
+        cutoff_percentage=job.cutoff_percentage,
+        generation_status="generating"
     )
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
-    
-    # Generate questions using Gemini
-    questions = gemini_service.generate_questions(jd_data)
-    
-    for q_data in questions:
-        question = Question(
-            job_id=new_job.id,
-            question_type=q_data["question_type"],
-            question_text=q_data["question_text"],
-            difficulty=q_data["difficulty"],
-            skill_tested=q_data["skill_tested"],
-            options=q_data.get("options"),
-            correct_answer=q_data.get("correct_answer"),
-            test_cases=q_data.get("test_cases"),
-            starter_code=q_data.get("starter_code"),
-            max_score=q_data["max_score"]
-        )
-        db.add(question)
+    await db.flush()
     
-    db.commit()
+    # Same transaction as the job, so the task can't be lost in between
+    await db.run_sync(enqueue, "generate_job_questions", {"job_id": new_job.id})
+    await db.commit()
+    await db.refresh(new_job)
+    task_pool.notify()
     
     return new_job
 
 @app.get("/jobs", response_model=List[JobResponse])
-def get_jobs(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Get all active jobs"""
-    jobs = db.query(Job).filter(Job.is_active == True).offset(skip).limit(limit).all()
-    return jobs
+async def get_jobs(response: Response,
+                   limit: int = Query(10, ge=1, le=100),
+                   cursor: Optional[str] = None,
+                   skill: List[str] = Query([]),
+                   skip: Optional[int] = Query(None, deprecated=True),
+                   db: AsyncSession = Depends(get_async_db)):
+    """Get active jobs, newest first.
+
+    Pass the X-Next-Cursor header of one page as ``cursor`` to get the next.
+    Repeat ``skill`` to list only jobs that require all of the given skills.
+    """
+    if skip:
+        # Ignoring it would hand old clients page one again
+        raise HTTPException(status_code=400,
+                            detail="skip is no longer supported; page with the X-Next-Cursor header as cursor")
+    try:
+        jobs, next_cursor = await db.run_sync(job_listing.page, limit, cursor, skill)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return fast_json.encode(List[JobResponse], jobs, response)
 
 @app.get("/jobs/{job_id}", response_model=JobResponse)
-def get_job(job_id: int, db: Session = Depends(get_db)):
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get job details"""
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return job
 
+@app.get("/jobs/{job_id}/status", response_model=JobStatusResponse)
+async def get_job_status(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Poll question generation progress for a job"""
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    question_count = await db.scalar(select(func.count(Question.id)).where(Question.job_id == job_id))
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.generation_status or "ready",
+        question_count=question_count,
+        error=job.generation_error
+    )
+
 # ==================== ASSESSMENT ROUTES ====================
 
 @app.post("/assessments", response_model=AssessmentResponse)
-def create_assessment(assessment: AssessmentCreate, 
-                     current_user: User = Depends(get_current_user),
-                     db: Session = Depends(get_db)):
+async def create_assessment(assessment: AssessmentCreate, 
+                            current_user: UserSnapshot = Depends(get_current_user),
+                            db: AsyncSession = Depends(get_async_db)):
     """Start new assessment for candidate"""
-    job = db.query(Job).filter(Job.id == assessment.job_id).first()
+    job = await db.get(Job, assessment.job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    if job.generation_status not in (None, "ready"):
+        raise HTTPException(status_code=409, detail="Assessment questions are not ready yet")
+    
     # Check if already taken
-    existing = db.query(Assessment).filter(
+    existing = await db.scalar(select(Assessment).where(
         Assessment.job_id == assessment.job_id,
         Assessment.candidate_id == current_user.id
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="Assessment already taken")
     
     # Calculate max possible score
-    questions = db.query(Question).filter(Question.job_id == assessment.job_id).all()
-    max_score = sum(q.max_score for q in questions)
+    max_score = await db.scalar(
+        select(func.coalesce(func.sum(Question.max_score), 0)).where(Question.job_id == assessment.job_id)
+    )
     
     new_assessment = Assessment(
         job_id=assessment.job_id,
@@ -179,47 +253,203 @@ def create_assessment(assessment: AssessmentCreate,
         resume_url=assessment.resume_url
     )
     db.add(new_assessment)
-    db.commit()
-    db.refresh(new_assessment)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request started the same assessment first
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Assessment already taken")
+    await db.refresh(new_assessment)
     
     return new_assessment
 
 @app.get("/assessments/{assessment_id}/questions", response_model=List[QuestionResponse])
-def get_assessment_questions(assessment_id: int, 
-                            current_user: User = Depends(get_current_user),
-                            db: Session = Depends(get_db)):
+async def get_assessment_questions(assessment_id: int, 
+                                   current_user: UserSnapshot = Depends(get_current_user),
+                                   db: AsyncSession = Depends(get_async_db)):
     """Get questions for assessment"""
-    assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
+    assessment = await db.get(Assessment, assessment_id)
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
     if assessment.candidate_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    questions = db.query(Question).filter(Question.job_id == assessment.job_id).all()
-    
-    # Don't send correct answers for MCQ
-    for q in questions:
-        if q.question_type == "mcq":
-            q.correct_answer = None
+    # Same for every candidate on the job, so it's served as cached JSON
+    payload, generation = question_cache.get(assessment.job_id)
+    if payload is None:
+        rows = (await db.execute(candidate_questions_query(assessment.job_id))).all()
+        payload = await run_in_threadpool(serialize_questions, rows)
+        question_cache.put(assessment.job_id, payload, generation)
     
-    return questions
+    return Response(content=payload, media_type="application/json")
 
 @app.post("/assessments/{assessment_id}/submit", response_model=SubmissionResponse)
-def submit_answer(assessment_id: int, submission: SubmissionCreate,
-                 current_user: User = Depends(get_current_user),
-                 db: Session = Depends(get_db)):
+async def submit_answer(assessment_id: int, submission: SubmissionCreate,
+                        current_user: UserSnapshot = Depends(get_current_user),
+                        db: AsyncSession = Depends(get_async_db)):
     """Submit answer for a question"""
-    assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
+    assessment = await db.get(Assessment, assessment_id)
+    if not assessment or assessment.candidate_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    question = await db.get(Question, submission.question_id)
+    if not question:
+        raise HTTPException(status_code=404, detail="Question not found")
+    
+    new_submission = build_submission(assessment_id, submission)
+    
+    # Evaluate based on question type
+    if question.question_type == "mcq":
+        grade_mcq([(new_submission, question)])
+    
+    elif question.question_type == "coding":
+        try:
+            await grade_coding(new_submission, question)
+        except GradingQueueFull as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Code grader is busy, please retry",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+    
+    elif question.question_type == "subjective" and settings.SUBJECTIVE_GRADING_MODE != "deferred":
+        # In deferred mode the answer is graded in a batch on completion
+        await grade_subjective([(new_submission, question)])
+    
+    await store_submissions(db, [new_submission])
+    await db.commit()
+    await db.refresh(new_submission)
+    
+    return new_submission
+
+@app.post("/assessments/{assessment_id}/submissions:batch", response_model=List[SubmissionStatus])
+async def submit_answers(assessment_id: int, batch: SubmissionBatch, response: Response,
+                         current_user: UserSnapshot = Depends(get_current_user),
+                         db: AsyncSession = Depends(get_async_db)):
+    """Submit answers to several questions at once.
+
+    Questions are loaded in one query, MCQs are scored in one pass, coding
+    and subjective answers are graded concurrently, and every submission is
+    written in one transaction. Returns a status per answer, in request
+    order; answers marked ``busy`` were not stored and can be resubmitted.
+    """
+    assessment = await db.get(Assessment, assessment_id)
     if not assessment or assessment.candidate_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    question = db.query(Question).filter(Question.id == submission.question_id).first()
+    question_ids = [item.question_id for item in batch.submissions]
+    if not question_ids:
+        raise HTTPException(status_code=400, detail="No submissions")
+    if len(set(question_ids)) != len(question_ids):
+        raise HTTPException(status_code=400, detail="Each question can be submitted once per batch")
+    
+    questions = {q.id: q for q in await db.scalars(select(Question).where(
+        Question.id.in_(question_ids), Question.job_id == assessment.job_id
+    ))}
+    pairs = [(build_submission(assessment_id, item), questions[item.question_id])
+             for item in batch.submissions if item.question_id in questions]
+    
+    grade_mcq([(s, q) for s, q in pairs if q.question_type == "mcq"])
+    coding = [(s, q) for s, q in pairs if q.question_type == "coding"]
+    subjective = [(s, q) for s, q in pairs if q.question_type == "subjective"]
+    if settings.SUBJECTIVE_GRADING_MODE == "deferred":
+        subjective = []
+    *coding_outcomes, subjective_outcome = await asyncio.gather(
+        *(grade_coding(s, q) for s, q in coding), grade_subjective(subjective), return_exceptions=True
+    )
+    if isinstance(subjective_outcome, BaseException):
+        raise subjective_outcome
+    
+    busy = set()
+    for (s, _), outcome in zip(coding, coding_outcomes):
+        if isinstance(outcome, GradingQueueFull):
+            busy.add(s.question_id)
+            response.headers["Retry-After"] = str(outcome.retry_after)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+    
+    stored = {s.question_id: s for s, _ in pairs if s.question_id not in busy}
+    await store_submissions(db, list(stored.values()))
+    await db.commit()
+    
+    statuses = []
+    for question_id in question_ids:
+        submission = stored.get(question_id)
+        if submission is not None:
+            statuses.append(SubmissionStatus(
+                question_id=question_id, status="graded" if submission.score is not None else "pending",
+                submission_id=submission.id, score=submission.score, is_correct=submission.is_correct,
+                ai_feedback=submission.ai_feedback
+            ))
+        else:
+            statuses.append(SubmissionStatus(question_id=question_id,
+                                             status="busy" if question_id in busy else "not_found"))
+    return fast_json.encode(List[SubmissionStatus], statuses, response)
+
+@app.post("/assessments/{assessment_id}/submit:stream")
+async def submit_code_stream(assessment_id: int, submission: SubmissionCreate,
+                             current_user: UserSnapshot = Depends(get_current_user),
+                             db: AsyncSession = Depends(get_async_db)):
+    """Submit a coding answer and follow its grading as server-sent events.
+
+    Sends a ``case`` event as each test case finishes ({"index", "passed",
+    "completed", "total"}), then one ``result`` event carrying the stored
+    submission, as returned by /submit. Errors after the stream has started
+    arrive as an ``error`` event.
+    """
+    assessment = await db.get(Assessment, assessment_id)
+    if not assessment or assessment.candidate_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    question = await db.get(Question, submission.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
+    if question.question_type != "coding":
+        raise HTTPException(status_code=400, detail="Only coding answers can be streamed")
     
-    # Create submission
-    new_submission = Submission(
+    try:
+        events = await grading_scheduler.stream(submission.code_submission, question.test_cases)
+    except GradingQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Code grader is busy, please retry",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    async def event_stream():
+        total = len(question.test_cases or [])
+        completed = 0
+        try:
+            async for event, data in events:
+                if event == "case":
+                    # Only pass/fail: expected outputs of hidden test cases stay on the server
+                    completed += 1
+                    yield server_sent_event("case", {"index": data["index"], "passed": data["passed"],
+                                                     "completed": completed, "total": total})
+                    continue
+                
+                new_submission = build_submission(assessment_id, submission)
+                apply_coding_result(new_submission, question, data)
+                # The request's session is closed once the response starts
+                async with AsyncSessionLocal() as session:
+                    await store_submissions(session, [new_submission])
+                    await session.commit()
+                response = SubmissionResponse.model_validate(new_submission)
+                yield server_sent_event("result", response.model_dump(mode="json"))
+        except Exception as e:
+            print(f"Error in submit_code_stream: {e!r}")
+            yield server_sent_event("error", {"detail": "Grading failed"})
+    
+    # identity encoding keeps GZipMiddleware from buffering the events
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "Content-Encoding": "identity",
+                                      "X-Accel-Buffering": "no"})
+
+# ==================== GRADING HELPERS ====================
+
+def build_submission(assessment_id: int, submission: SubmissionCreate) -> Submission:
+    return Submission(
         assessment_id=assessment_id,
         question_id=submission.question_id,
         answer=submission.answer,
@@ -227,78 +457,208 @@ def submit_answer(assessment_id: int, submission: SubmissionCreate,
         code_submission=submission.code_submission,
         submitted_at=datetime.utcnow()
     )
-    
-    # Evaluate based on question type
-    if question.question_type == "mcq":
-        # Check MCQ answer
-        is_correct = submission.selected_option == question.correct_answer
-        new_submission.is_correct = is_correct
-        new_submission.score = question.max_score if is_correct else 0
-        new_submission.ai_feedback = "Correct!" if is_correct else f"Incorrect. Correct answer: {question.correct_answer}"
-    
-    elif question.question_type == "coding":
-        # Execute code
-        result = code_executor.execute_python_code(
-            submission.code_submission,
-            question.test_cases
-        )
-        new_submission.score = (result["score_percentage"] / 100) * question.max_score
-        new_submission.is_correct = result["passed"] == result["total"]
-        new_submission.ai_feedback = f"Passed {result['passed']}/{result['total']} test cases"
-    
-    elif question.question_type == "subjective":
-        # AI evaluation
-        evaluation = gemini_service.evaluate_subjective_answer(
-            question.question_text,
-            submission.answer,
-            question.max_score
-        )
-        new_submission.score = evaluation["score"]
-        new_submission.ai_feedback = evaluation["feedback"]
-    
-    # Check plagiarism
-    previous_submissions = db.query(Submission).filter(
-        Submission.question_id == submission.question_id,
-        Submission.id != new_submission.id
-    ).all()
-    
-    if submission.answer or submission.code_submission:
-        content = submission.code_submission or submission.answer
-        plagiarism_result = plagiarism_detector.check_against_database(
-            content,
-            [s.code_submission or s.answer for s in previous_submissions if s.code_submission or s.answer]
+
+def grade_mcq(pairs: List[Tuple[Submission, Question]]):
+    """Score MCQ answers against their keys in one vectorized pass"""
+    if not pairs:
+        return
+    selected = np.array([s.selected_option for s, _ in pairs], dtype=object)
+    correct = np.array([q.correct_answer for _, q in pairs], dtype=object)
+    is_correct = selected == correct
+    scores = np.where(is_correct, np.array([q.max_score or 0 for _, q in pairs], dtype=float), 0.0)
+    for (submission, question), ok, score in zip(pairs, is_correct.tolist(), scores.tolist()):
+        submission.is_correct = ok
+        submission.score = score
+        submission.ai_feedback = "Correct!" if ok else f"Incorrect. Correct answer: {question.correct_answer}"
+
+async def grade_coding(submission: Submission, question: Question):
+    """Run the test cases; raises GradingQueueFull when the grader is saturated"""
+    result = await grading_scheduler.agrade(submission.code_submission, question.test_cases)
+    apply_coding_result(submission, question, result)
+
+def apply_coding_result(submission: Submission, question: Question, result: Dict[str, Any]):
+    submission.score = (result["score_percentage"] / 100) * question.max_score
+    submission.is_correct = result["passed"] == result["total"]
+    submission.ai_feedback = f"Passed {result['passed']}/{result['total']} test cases"
+
+async def grade_subjective(pairs: List[Tuple[Submission, Question]]):
+    """AI evaluation; several answers share batched LLM calls"""
+    if len(pairs) == 1:
+        submission, question = pairs[0]
+        evaluations = [await gemini_service.aevaluate_subjective_answer(
+            question.question_text, submission.answer, question.max_score
+        )]
+    elif pairs:
+        evaluations = await gemini_service.aevaluate_subjective_batch(
+            [(q.question_text, s.answer, q.max_score) for s, q in pairs]
         )
-        new_submission.plagiarism_score = plagiarism_result["max_similarity"]
-        new_submission.similar_submissions = plagiarism_result["similar_submissions"]
-    
-    db.add(new_submission)
-    db.commit()
-    db.refresh(new_submission)
-    
-    return new_submission
+    else:
+        return
+    for (submission, _), evaluation in zip(pairs, evaluations):
+        submission.score = evaluation["score"]
+        submission.ai_feedback = evaluation["feedback"]
+
+def server_sent_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def plagiarism_content(submission: Submission) -> Optional[str]:
+    return submission.code_submission or submission.answer
+
+async def store_submissions(db: AsyncSession, submissions: List[Submission]):
+    """Plagiarism-check and insert graded submissions; the caller commits"""
+    checked = [s for s in submissions if plagiarism_content(s)]
+    if checked:
+        results = await run_in_threadpool(check_plagiarism,
+                                          [(s.question_id, plagiarism_content(s)) for s in checked])
+        for submission, result in zip(checked, results):
+            submission.plagiarism_score = result["max_similarity"]
+            submission.similar_submissions = result["similar_submissions"]
+    
+    # A single flush sends the rows as one multi-row INSERT
+    db.add_all(submissions)
+    await db.flush()
+    if checked:
+        await db.run_sync(record_plagiarism, checked)
+
+def check_plagiarism(items: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+    """Plagiarism lookups for (question_id, content) pairs on a worker thread with its own session.
+
+    Fitting and querying the similarity index is CPU work done under a
+    thread lock, which must not run on the event loop.
+    """
+    db = SessionLocal()
+    try:
+        return [plagiarism_detector.check_submission(db, question_id, content) for question_id, content in items]
+    finally:
+        db.close()
+
+def record_plagiarism(db: Session, submissions: List[Submission]):
+    for submission in submissions:
+        plagiarism_detector.record_submission(db, submission, plagiarism_content(submission))
+
+async def grade_pending_subjective(db: AsyncSession, assessment_id: int):
+    """Grade every ungraded subjective answer of an assessment in batched LLM calls"""
+    pending = (await db.execute(select(Submission, Question.question_text, Question.max_score).join(
+        Question, Question.id == Submission.question_id
+    ).where(
+        Submission.assessment_id == assessment_id,
+        Question.question_type == "subjective",
+        Submission.score.is_(None)
+    ))).all()
+    if not pending:
+        return
+    
+    evaluations = await gemini_service.aevaluate_subjective_batch(
+        [(question_text, submission.answer, max_score) for submission, question_text, max_score in pending]
+    )
+    for (submission, _, _), evaluation in zip(pending, evaluations):
+        submission.score = evaluation["score"]
+        submission.ai_feedback = evaluation["feedback"]
+    # The score aggregate below reads these rows back
+    await db.flush()
+
+async def grade_before_completion(db: AsyncSession, assessment: Assessment):
+    """Claim the assessment as "grading", then grade its pending subjective answers.
+
+    The claim is committed before any LLM call, so a concurrent or retried
+    completion gets a 409 instead of paying for the same grades, and the
+    write lock isn't held while the model answers. completed_at holds the
+    claim time: a claim older than the grading budget (its process died) can
+    be taken over. If grading fails the assessment goes back to its previous
+    status, so the candidate can simply retry.
+    """
+    assessment_id = assessment.id  # the rollback below expires the instance
+    # A taken-over claim goes back to in_progress, never to a stale "grading"
+    previous_status = assessment.status if assessment.status != "grading" else "in_progress"
+    lease = 2 * gemini_service.client.budget(gemini_service.timeout)  # batches, then single retries
+    now = datetime.utcnow()
+    claimed = (await db.execute(update(Assessment).where(
+        Assessment.id == assessment_id,
+        or_(Assessment.status.notin_(("grading", "completed")),
+            and_(Assessment.status == "grading", Assessment.completed_at < now - timedelta(seconds=lease)))
+    ).values(status="grading", completed_at=now))).rowcount
+    await db.commit()
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Assessment already completed")
+    
+    try:
+        await grade_pending_subjective(db, assessment_id)
+    except BaseException:
+        await db.rollback()
+        await db.execute(update(Assessment).where(
+            Assessment.id == assessment_id,
+            Assessment.status == "grading"
+        ).values(status=previous_status, completed_at=None))
+        await db.commit()
+        raise
 
 @app.post("/assessments/{assessment_id}/complete")
-def complete_assessment(assessment_id: int,
-                       current_user: User = Depends(get_current_user),
-                       db: Session = Depends(get_db)):
+async def complete_assessment(assessment_id: int,
+                              current_user: UserSnapshot = Depends(get_current_user),
+                              db: AsyncSession = Depends(get_async_db)):
     """Complete assessment and generate evaluation"""
-    assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
-    if not assessment or assessment.candidate_id != current_user.id:
+    row = (await db.execute(select(Assessment, Job).join(Job, Job.id == Assessment.job_id).where(
+        Assessment.id == assessment_id
+    ))).first()
+    if not row or row[0].candidate_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
+    assessment, job = row
+    if assessment.status == "completed":
+        raise HTTPException(status_code=409, detail="Assessment already completed")
+    
+    claimable = Assessment.status.notin_(("grading", "completed"))
+    if settings.SUBJECTIVE_GRADING_MODE == "deferred":
+        await grade_before_completion(db, assessment)
+        claimable = Assessment.status == "grading"
+    
+    # Claim the completion before reading the scores it is computed from. The
+    # UPDATE takes the write lock (SQLite) or row lock (Postgres) until commit,
+    # so a concurrent or repeated call gets a 409 and score distribution
+    # updates don't interleave.
+    claimed = (await db.execute(update(Assessment).where(
+        Assessment.id == assessment_id,
+        claimable
+    ).values(status="completed", completed_at=datetime.utcnow()))).rowcount
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Assessment already completed")
+    
+    # Score totals per (skill, question type) in one grouped query
+    totals = (await db.execute(select(
+        Question.skill_tested,
+        Question.question_type,
+        func.coalesce(func.sum(Submission.score), 0),
+        func.count(Submission.id)
+    ).join(Question, Question.id == Submission.question_id).where(
+        Submission.assessment_id == assessment_id
+    ).group_by(Question.skill_tested, Question.question_type))).all()
+    
+    # Only the columns anomaly detection looks at
+    answers = (await db.execute(select(Submission.selected_option, Submission.plagiarism_score).where(
+        Submission.assessment_id == assessment_id
+    ))).all()
+    
+    skill_totals = {}
+    type_scores = {"mcq": 0, "subjective": 0, "coding": 0}
+    for skill, question_type, score, count in totals:
+        skill_score, skill_count = skill_totals.get(skill, (0, 0))
+        skill_totals[skill] = (skill_score + score, skill_count + count)
+        if question_type in type_scores:
+            type_scores[question_type] += score
     
-    # Calculate total score
-    submissions = db.query(Submission).filter(Submission.assessment_id == assessment_id).all()
-    total_score = sum(s.score or 0 for s in submissions)
+    # Average skill scores
+    skill_scores = {skill: score / count for skill, (score, count) in skill_totals.items()}
+    mcq_score = type_scores["mcq"]
+    subjective_score = type_scores["subjective"]
+    coding_score = type_scores["coding"]
+    total_score = sum(score for score, _ in skill_totals.values())
     
     assessment.total_score = total_score
     assessment.percentage = (total_score / assessment.max_possible_score * 100) if assessment.max_possible_score > 0 else 0
-    assessment.status = "completed"
-    assessment.completed_at = datetime.utcnow()
     
     # Detect anomalies
     assessment_data = {
-        "submissions": [{"time_taken_seconds": 30, "selected_option": s.selected_option, 
-                        "plagiarism_score": s.plagiarism_score or 0} for s in submissions],
+        "submissions": [{"time_taken_seconds": 30, "selected_option": selected_option, 
+                        "plagiarism_score": plagiarism_score or 0} for selected_option, plagiarism_score in answers],
         "total_score": total_score,
         "max_possible_score": assessment.max_possible_score
     }
@@ -308,120 +668,103 @@ def complete_assessment(assessment_id: int,
         assessment.is_suspicious = True
         assessment.anomaly_flags = anomalies
     
-    # Calculate ranking
-    job_assessments = db.query(Assessment).filter(
-        Assessment.job_id == assessment.job_id,
-        Assessment.status == "completed"
-    ).order_by(Assessment.total_score.desc()).all()
-    
-    for idx, a in enumerate(job_assessments, 1):
-        a.rank = idx
-    
-    # Generate detailed evaluation
-    skill_scores = {}
-    mcq_score = 0
-    subjective_score = 0
-    coding_score = 0
-    
-    for submission in submissions:
-        question = db.query(Question).filter(Question.id == submission.question_id).first()
-        if question:
-            # Track by skill
-            if question.skill_tested not in skill_scores:
-                skill_scores[question.skill_tested] = []
-            skill_scores[question.skill_tested].append(submission.score or 0)
-            
-            # Track by type
-            if question.question_type == "mcq":
-                mcq_score += submission.score or 0
-            elif question.question_type == "subjective":
-                subjective_score += submission.score or 0
-            elif question.question_type == "coding":
-                coding_score += submission.score or 0
+    percentile, sample_size = await db.run_sync(leaderboard.record_score, assessment)
     
-    # Average skill scores
-    skill_scores = {skill: sum(scores)/len(scores) for skill, scores in skill_scores.items()}
-    
-    # Generate AI report
-    report_data = {
-        "total_score": total_score,
-        "percentage": assessment.percentage,
-        "skill_scores": skill_scores,
-        "is_suspicious": assessment.is_suspicious
-    }
-    
-    ai_report = gemini_service.generate_evaluation_report(report_data)
-    
-    # Create evaluation
+    # Create evaluation; the AI report is written by a background task
     evaluation = Evaluation(
         assessment_id=assessment_id,
-        strengths=ai_report.get("strengths", []),
-        weaknesses=ai_report.get("weaknesses", []),
-        skill_gaps=ai_report.get("skill_gaps", []),
         skill_scores=skill_scores,
         mcq_score=mcq_score,
         subjective_score=subjective_score,
         coding_score=coding_score,
-        percentile=0,  # Calculate later
-        qualified=assessment.percentage >= db.query(Job).filter(Job.id == assessment.job_id).first().cutoff_percentage,
-        ai_summary=ai_report.get("ai_summary", ""),
-        recommendation=ai_report.get("recommendation", "")
+        percentile=percentile,
+        percentile_sample_size=sample_size,
+        qualified=assessment.percentage >= job.cutoff_percentage,
+        report_status="pending"
     )
     
     db.add(evaluation)
-    db.commit()
+    await db.flush()
+    await db.run_sync(enqueue, "generate_evaluation_report", {"evaluation_id": evaluation.id})
+    await db.run_sync(leaderboard.record_completion, assessment, current_user.full_name, skill_scores)
+    await db.commit()
+    task_pool.notify()
     
-    return {"message": "Assessment completed", "assessment_id": assessment_id}
+    return {"message": "Assessment completed", "assessment_id": assessment_id, "report_status": "pending"}
 
 # ==================== RESULTS & LEADERBOARD ROUTES ====================
 
 @app.get("/assessments/{assessment_id}/results", response_model=EvaluationResponse)
-def get_results(assessment_id: int, 
-                current_user: User = Depends(get_current_user),
-                db: Session = Depends(get_db)):
+async def get_results(assessment_id: int, 
+                      current_user: UserSnapshot = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db)):
     """Get detailed assessment results"""
-    assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
+    assessment = await db.get(Assessment, assessment_id)
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
     # Allow candidate and recruiter to view
-    job = db.query(Job).filter(Job.id == assessment.job_id).first()
+    job = await db.get(Job, assessment.job_id)
     if assessment.candidate_id != current_user.id and job.recruiter_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    evaluation = db.query(Evaluation).filter(Evaluation.assessment_id == assessment_id).first()
+    evaluation = await db.scalar(select(Evaluation).where(Evaluation.assessment_id == assessment_id))
     if not evaluation:
         raise HTTPException(status_code=404, detail="Evaluation not found")
     
-    return evaluation
+    if await db.run_sync(leaderboard.refresh_percentile, evaluation, assessment):
+        await db.commit()
+        await db.refresh(evaluation)
+    
+    return fast_json.encode(EvaluationResponse, evaluation)
 
 @app.get("/jobs/{job_id}/leaderboard", response_model=List[LeaderboardEntry])
-def get_leaderboard(job_id: int, db: Session = Depends(get_db)):
-    """Get leaderboard for a job"""
-    assessments = db.query(Assessment, User).join(User).filter(
-        Assessment.job_id == job_id,
-        Assessment.status == "completed"
-    ).order_by(Assessment.rank).all()
-    
-    leaderboard = []
-    for assessment, user in assessments:
-        evaluation = db.query(Evaluation).filter(
-            Evaluation.assessment_id == assessment.id
-        ).first()
-        
-        leaderboard.append(LeaderboardEntry(
-            rank=assessment.rank or 0,
-            candidate_name=user.full_name,
-            total_score=assessment.total_score or 0,
-            percentage=assessment.percentage or 0,
-            skill_scores=evaluation.skill_scores if evaluation else {},
-            completed_at=assessment.completed_at or assessment.created_at
-        ))
-    
-    return leaderboard
+async def get_leaderboard(job_id: int, response: Response,
+                          limit: int = Query(100, ge=1, le=1000),
+                          cursor: Optional[str] = None,
+                          top: Optional[int] = Query(None, ge=1, le=1000),
+                          db: AsyncSession = Depends(get_async_db)):
+    """Get leaderboard for a job.
+
+    Pages are served from the materialized leaderboard table; pass the
+    X-Next-Cursor header of one page as ``cursor`` to get the next. ``top``
+    returns only the first K entries.
+    """
+    if top is not None:
+        limit, cursor = top, None
+    
+    try:
+        ranked, next_cursor = await db.run_sync(leaderboard.page, job_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if next_cursor and top is None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return fast_json.encode(List[LeaderboardEntry], [LeaderboardEntry(
+        rank=rank,
+        candidate_name=entry.candidate_name,
+        total_score=entry.total_score,
+        percentage=entry.percentage,
+        skill_scores=entry.skill_scores or {},
+        completed_at=entry.completed_at
+    ) for rank, entry in ranked], response)
+
+@app.get("/metrics")
+def metrics():
+    """Runtime counters for caches and background workers; a plain def, since
+    task_pool.stats() queries the database through the sync engine"""
+    return {
+        "llm_cache": gemini_service.cache.stats() if gemini_service.cache else None,
+        "llm_client": llm_client.stats(),
+        "background_tasks": task_pool.stats(),
+        "grading": grading_scheduler.stats(),
+        "auth_cache": user_cache.stats(),
+        "question_cache": question_cache.stats()
+    }
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "AI Assessment Platform API", "version": "1.0.0"}
 
 if __name__ == "__main__":
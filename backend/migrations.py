@@ -0,0 +1,342 @@
+"""Versioned schema migrations.
+
+Each migration runs once, in its own transaction, and is recorded in the
+schema_version table. Steps are written to be safe on both a fresh database
+and one created by an older release with ``Base.metadata.create_all``.
+
+Every step carries its own frozen table definitions and SQL; nothing here is
+read from models.py or other app code, so a shipped migration keeps meaning
+the same thing when the models change. Schema changes go in a new step.
+
+Usage: python migrations.py  (applies pending migrations to DATABASE_URL)
+"""
+from datetime import datetime
+from typing import Callable, List, Sequence, Tuple
+
+from sqlalchemy import (JSON, BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer,
+                        MetaData, String, Table, Text, inspect, select, text)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.types import TypeEngine
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+# ==================== FROZEN TABLES ====================
+
+# Copies of the tables as the step that creates them first shipped them
+_schema = MetaData()
+
+# Step 1: the schema of the first versioned release
+_users = Table(
+    "users", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("hashed_password", String),
+    Column("full_name", String),
+    Column("role", String),
+    Column("created_at", DateTime)
+)
+
+_jobs = Table(
+    "jobs", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, index=True),
+    Column("description", Text),
+    Column("recruiter_id", Integer, ForeignKey("users.id")),
+    Column("required_skills", JSON),
+    Column("experience_level", String),
+    Column("role_type", String),
+    Column("domain_knowledge", JSON),
+    Column("duration_minutes", Integer),
+    Column("cutoff_percentage", Float),
+    Column("generation_status", String),
+    Column("generation_error", Text),
+    Column("created_at", DateTime),
+    Column("is_active", Boolean)
+)
+
+_questions = Table(
+    "questions", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("job_id", Integer, ForeignKey("jobs.id"), index=True),
+    Column("question_type", String),
+    Column("question_text", Text),
+    Column("difficulty", String),
+    Column("skill_tested", String),
+    Column("options", JSON),
+    Column("correct_answer", String),
+    Column("test_cases", JSON),
+    Column("starter_code", Text),
+    Column("max_score", Float),
+    Column("weightage", Float),
+    Column("created_at", DateTime)
+)
+
+_assessments = Table(
+    "assessments", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("job_id", Integer, ForeignKey("jobs.id")),
+    Column("candidate_id", Integer, ForeignKey("users.id")),
+    Column("status", String),
+    Column("started_at", DateTime),
+    Column("completed_at", DateTime),
+    Column("total_score", Float),
+    Column("max_possible_score", Float),
+    Column("percentage", Float),
+    Column("rank", Integer),
+    Column("is_suspicious", Boolean),
+    Column("anomaly_flags", JSON),
+    Column("resume_url", String),
+    Column("resume_skills", JSON),
+    Column("skill_match_score", Float),
+    Column("created_at", DateTime),
+    Index("uq_assessments_job_candidate", "job_id", "candidate_id", unique=True),
+    Index("ix_assessments_job_status_score", "job_id", "status", "total_score")
+)
+
+_submissions = Table(
+    "submissions", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("assessment_id", Integer, ForeignKey("assessments.id")),
+    Column("question_id", Integer, ForeignKey("questions.id")),
+    Column("answer", Text),
+    Column("selected_option", String),
+    Column("code_submission", Text),
+    Column("score", Float),
+    Column("is_correct", Boolean),
+    Column("ai_feedback", Text),
+    Column("time_taken_seconds", Integer),
+    Column("submitted_at", DateTime),
+    Column("plagiarism_score", Float),
+    Column("similar_submissions", JSON),
+    Column("minhash_signature", JSON),
+    Index("ix_submissions_assessment_question", "assessment_id", "question_id"),
+    Index("ix_submissions_question_id", "question_id", "id")
+)
+
+_lsh_buckets = Table(
+    "lsh_buckets", _schema,
+    Column("id", Integer, primary_key=True),
+    Column("question_id", Integer, ForeignKey("questions.id"), nullable=False),
+    Column("submission_id", Integer, ForeignKey("submissions.id"), nullable=False),
+    Column("band", Integer, nullable=False),
+    Column("bucket_hash", BigInteger, nullable=False),
+    Index("ix_lsh_buckets_lookup", "question_id", "bucket_hash")
+)
+
+_evaluations = Table(
+    "evaluations", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("assessment_id", Integer, ForeignKey("assessments.id"), index=True),
+    Column("strengths", JSON),
+    Column("weaknesses", JSON),
+    Column("skill_gaps", JSON),
+    Column("skill_scores", JSON),
+    Column("mcq_score", Float),
+    Column("subjective_score", Float),
+    Column("coding_score", Float),
+    Column("percentile", Float),
+    Column("percentile_sample_size", Integer),
+    Column("qualified", Boolean),
+    Column("ai_summary", Text),
+    Column("recommendation", Text),
+    Column("report_status", String),
+    Column("report_error", Text),
+    Column("created_at", DateTime)
+)
+
+_background_tasks = Table(
+    "background_tasks", _schema,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("kind", String, index=True),
+    Column("payload", JSON),
+    Column("status", String, index=True),
+    Column("attempts", Integer),
+    Column("max_attempts", Integer),
+    Column("run_after", DateTime),
+    Column("locked_at", DateTime),
+    Column("locked_by", String),
+    Column("last_error", Text),
+    Column("created_at", DateTime),
+    Column("finished_at", DateTime)
+)
+
+_leaderboard_entries = Table(
+    "leaderboard_entries", _schema,
+    Column("id", Integer, primary_key=True),
+    Column("job_id", Integer, ForeignKey("jobs.id"), nullable=False),
+    Column("assessment_id", Integer, ForeignKey("assessments.id"), nullable=False, unique=True),
+    Column("candidate_id", Integer, ForeignKey("users.id")),
+    Column("candidate_name", String),
+    Column("total_score", Float, nullable=False),
+    Column("percentage", Float, nullable=False),
+    Column("skill_scores", JSON),
+    Column("completed_at", DateTime, nullable=False)
+)
+Index("ix_leaderboard_entries_order", _leaderboard_entries.c.job_id, _leaderboard_entries.c.total_score.desc(),
+      _leaderboard_entries.c.completed_at, _leaderboard_entries.c.assessment_id)
+
+_score_distributions = Table(
+    "score_distributions", _schema,
+    Column("job_id", Integer, ForeignKey("jobs.id"), primary_key=True),
+    Column("tree", JSON, nullable=False),
+    Column("count", Integer, nullable=False),
+    Column("updated_at", DateTime)
+)
+
+_V1_TABLES = [_users, _jobs, _questions, _assessments, _submissions, _lsh_buckets, _evaluations,
+              _background_tasks, _leaderboard_entries, _score_distributions]
+
+# Step 4
+_job_skills = Table(
+    "job_skills", _schema,
+    Column("job_id", Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill", String, primary_key=True),
+    Index("ix_job_skills_skill_job", "skill", "job_id")
+)
+
+# Step 5
+_llm_rate_limits = Table(
+    "llm_rate_limits", _schema,
+    Column("name", String, primary_key=True),
+    Column("tokens", Float, nullable=False),
+    Column("updated_at", Float, nullable=False)
+)
+
+# ==================== HELPERS ====================
+
+def _add_column(conn: Connection, table: str, name: str, type_: TypeEngine, default_sql: str = None):
+    """ALTER TABLE ... ADD COLUMN, if it's missing"""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if name in existing:
+        return
+    ddl = f"ALTER TABLE {table} ADD COLUMN {name} {type_.compile(dialect=conn.dialect)}"
+    if default_sql is not None:
+        ddl += f" DEFAULT {default_sql}"
+    conn.execute(text(ddl))
+
+def _create_index(conn: Connection, table: str, name: str, columns: Sequence[str], unique: bool = False):
+    """CREATE INDEX unless it already exists"""
+    conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+                      f"ON {table} ({', '.join(columns)})"))
+
+def _normalize_skills(skills) -> List[str]:
+    # Frozen copy of job_listing.normalize_skills as of step 4
+    return sorted({" ".join(s.split()).lower() for s in skills or () if isinstance(s, str) and s.strip()})
+
+# ==================== MIGRATIONS ====================
+
+def _create_tables(conn: Connection):
+    # Creates whatever is missing; a fresh database gets the full step 1 schema
+    _schema.create_all(bind=conn, tables=_V1_TABLES)
+
+def _add_new_columns(conn: Connection):
+    # Columns added after the first release; existing rows keep their old meaning
+    _add_column(conn, "jobs", "generation_status", String(), "'ready'")
+    _add_column(conn, "jobs", "generation_error", Text())
+    _add_column(conn, "submissions", "minhash_signature", JSON())
+    _add_column(conn, "evaluations", "percentile_sample_size", Integer())
+    _add_column(conn, "evaluations", "report_status", String(), "'ready'")
+    _add_column(conn, "evaluations", "report_error", Text())
+
+def _add_hot_path_indexes(conn: Connection):
+    duplicates = conn.execute(text(
+        "SELECT job_id, candidate_id, COUNT(*) FROM assessments "
+        "GROUP BY job_id, candidate_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        raise RuntimeError(
+            f"Cannot enforce one assessment per candidate per job, {len(duplicates)} "
+            f"(job_id, candidate_id) pairs have several: {duplicates[:10]}"
+        )
+
+    _create_index(conn, "questions", "ix_questions_job_id", ["job_id"])
+    _create_index(conn, "submissions", "ix_submissions_assessment_question", ["assessment_id", "question_id"])
+    _create_index(conn, "submissions", "ix_submissions_question_id", ["question_id", "id"])
+    _create_index(conn, "assessments", "ix_assessments_job_status_score", ["job_id", "status", "total_score"])
+    _create_index(conn, "assessments", "uq_assessments_job_candidate", ["job_id", "candidate_id"], unique=True)
+    _create_index(conn, "evaluations", "ix_evaluations_assessment_id", ["assessment_id"])
+
+def _add_job_skills(conn: Connection):
+    _job_skills.create(conn, checkfirst=True)
+    _create_index(conn, "jobs", "ix_jobs_active_created", ["is_active", "created_at", "id"])
+
+    rows = []
+    for job_id, skills in conn.execute(select(_jobs.c.id, _jobs.c.required_skills)):
+        rows.extend({"job_id": job_id, "skill": s} for s in _normalize_skills(skills))
+    conn.execute(_job_skills.delete())
+    if rows:
+        conn.execute(_job_skills.insert(), rows)
+
+def _add_llm_rate_limits(conn: Connection):
+    _llm_rate_limits.create(conn, checkfirst=True)
+
+def _backfill_leaderboard(conn: Connection):
+    # Assessments completed before leaderboard_entries existed have no row and
+    # never reach the leaderboard. Drop the distributions too: they were seeded
+    # from the incomplete table and are rebuilt from it on the next completion.
+    conn.execute(text("""
+        INSERT INTO leaderboard_entries (job_id, assessment_id, candidate_id, candidate_name,
+                                         total_score, percentage, skill_scores, completed_at)
+        SELECT a.job_id, a.id, a.candidate_id, u.full_name,
+               COALESCE(a.total_score, 0), COALESCE(a.percentage, 0),
+               COALESCE((SELECT e.skill_scores FROM evaluations e WHERE e.assessment_id = a.id
+                         ORDER BY e.id LIMIT 1), '{}'),
+               COALESCE(a.completed_at, a.created_at)
+        FROM assessments a
+        JOIN users u ON u.id = a.candidate_id
+        WHERE a.status = 'completed'
+          AND NOT EXISTS (SELECT 1 FROM leaderboard_entries l WHERE l.assessment_id = a.id)
+    """))
+    conn.execute(text("DELETE FROM score_distributions"))
+
+def _clear_assessment_ranks(conn: Connection):
+    # Completion used to store a one-off rank that went stale as soon as a
+    # higher score landed; ranks now only come from the leaderboard
+    conn.execute(text("UPDATE assessments SET rank = NULL"))
+
+# Append only: never edit or reorder a migration that has shipped
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create tables", _create_tables),
+    (2, "add columns introduced since the first release", _add_new_columns),
+    (3, "indexes for hot query paths and one assessment per candidate", _add_hot_path_indexes),
+    (4, "job_skills table for skill filters and the job listing index", _add_job_skills),
+    (5, "llm_rate_limits table for the shared LLM token bucket", _add_llm_rate_limits),
+    (6, "leaderboard rows for assessments completed before the leaderboard", _backfill_leaderboard),
+    (7, "clear snapshot ranks stored on assessments", _clear_assessment_ranks),
+]
+
+# ==================== RUNNER ====================
+
+def current_version(engine: Engine) -> int:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("schema_version"):
+            return 0
+        versions = conn.execute(select(schema_version.c.version)).scalars().all()
+        return max(versions, default=0)
+
+def migrate(engine: Engine) -> List[int]:
+    """Apply pending migrations in order, returning the versions applied"""
+    _version_metadata.create_all(bind=engine)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current_version(engine):
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+        applied.append(version)
+    return applied
+
+if __name__ == "__main__":
+    from database import engine
+    applied = migrate(engine)
+    print(f"Applied {applied}" if applied else "Schema is up to date",
+          f"(version {current_version(engine)})")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, ForeignKey, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -35,6 +35,10 @@ class Job(Base):
     duration_minutes = Column(Integer, default=60)
     cutoff_percentage = Column(Float, default=60.0)
     
+    # Question generation runs in the background: generating, ready, failed
+    generation_status = Column(String, default="ready")
+    generation_error = Column(Text)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
@@ -42,12 +46,28 @@ class Job(Base):
     recruiter = relationship("User", back_populates="jobs")
     questions = relationship("Question", back_populates="job")
     assessments = relationship("Assessment", back_populates="job")
+    
+    __table_args__ = (
+        # Job listing order (newest first) and its keyset pagination
+        Index("ix_jobs_active_created", "is_active", "created_at", "id"),
+    )
+
+class JobSkill(Base):
+    """One normalized required skill of a job, so skill filters are index lookups"""
+    __tablename__ = "job_skills"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    skill = Column(String, primary_key=True)  # lowercased, see job_listing.normalize_skill
+    
+    __table_args__ = (
+        Index("ix_job_skills_skill_job", "skill", "job_id"),
+    )
 
 class Question(Base):
     __tablename__ = "questions"
     
     id = Column(Integer, primary_key=True, index=True)
-    job_id = Column(Integer, ForeignKey("jobs.id"))
+    job_id = Column(Integer, ForeignKey("jobs.id"), index=True)
     
     question_type = Column(String)  # mcq, subjective, coding
     question_text = Column(Text)
@@ -74,13 +94,18 @@ class Question(Base):
 
 class Assessment(Base):
     __tablename__ = "assessments"
+    __table_args__ = (
+        # One assessment per candidate per job
+        Index("uq_assessments_job_candidate", "job_id", "candidate_id", unique=True),
+        Index("ix_assessments_job_status_score", "job_id", "status", "total_score"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("jobs.id"))
     candidate_id = Column(Integer, ForeignKey("users.id"))
     
     # Status
-    status = Column(String, default="not_started")  # not_started, in_progress, completed
+    status = Column(String, default="not_started")  # not_started, in_progress, grading, completed
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
     
@@ -88,7 +113,7 @@ class Assessment(Base):
     total_score = Column(Float, default=0.0)
     max_possible_score = Column(Float)
     percentage = Column(Float)
-    rank = Column(Integer)
+    rank = Column(Integer)  # no longer written; ranks are positions in the leaderboard, computed on read
     
     # Flags
     is_suspicious = Column(Boolean, default=False)
@@ -109,6 +134,11 @@ class Assessment(Base):
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        Index("ix_submissions_assessment_question", "assessment_id", "question_id"),
+        # Per-question history, read incrementally by id by the plagiarism index
+        Index("ix_submissions_question_id", "question_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     assessment_id = Column(Integer, ForeignKey("assessments.id"))
@@ -131,16 +161,30 @@ class Submission(Base):
     # Plagiarism
     plagiarism_score = Column(Float)
     similar_submissions = Column(JSON)
+    minhash_signature = Column(JSON)  # Only filled by the minhash plagiarism backend
     
     # Relationships
     assessment = relationship("Assessment", back_populates="submissions")
     question = relationship("Question", back_populates="submissions")
 
+class LSHBucket(Base):
+    """One row per (submission, LSH band) for near-duplicate candidate lookup"""
+    __tablename__ = "lsh_buckets"
+    __table_args__ = (
+        Index("ix_lsh_buckets_lookup", "question_id", "bucket_hash"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False)
+    band = Column(Integer, nullable=False)
+    bucket_hash = Column(BigInteger, nullable=False)
+
 class Evaluation(Base):
     __tablename__ = "evaluations"
     
     id = Column(Integer, primary_key=True, index=True)
-    assessment_id = Column(Integer, ForeignKey("assessments.id"))
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), index=True)
     
     # Overall analysis
     strengths = Column(JSON)
@@ -157,13 +201,75 @@ class Evaluation(Base):
     
     # Ranking info
     percentile = Column(Float)
+    percentile_sample_size = Column(Integer)  # Job score distribution size when computed
     qualified = Column(Boolean)
     
     # AI insights
     ai_summary = Column(Text)
     recommendation = Column(Text)
+    report_status = Column(String, default="ready")  # pending, ready, failed
+    report_error = Column(Text)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     assessment = relationship("Assessment", back_populates="evaluation")
+
+class BackgroundTask(Base):
+    __tablename__ = "background_tasks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True)
+    payload = Column(JSON)
+    
+    # Lifecycle: queued -> running -> done / failed (queued again between retries)
+    status = Column(String, default="queued", index=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow)
+    locked_at = Column(DateTime)
+    locked_by = Column(String)
+    last_error = Column(Text)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+class LeaderboardRecord(Base):
+    """Materialized leaderboard row, written when an assessment is completed"""
+    __tablename__ = "leaderboard_entries"
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), nullable=False, unique=True)
+    candidate_id = Column(Integer, ForeignKey("users.id"))
+    candidate_name = Column(String)
+    total_score = Column(Float, nullable=False, default=0.0)
+    percentage = Column(Float, nullable=False, default=0.0)
+    skill_scores = Column(JSON)
+    completed_at = Column(DateTime, nullable=False)
+
+# Matches the leaderboard order: best score first, earlier completion wins ties
+Index(
+    "ix_leaderboard_entries_order",
+    LeaderboardRecord.job_id,
+    LeaderboardRecord.total_score.desc(),
+    LeaderboardRecord.completed_at,
+    LeaderboardRecord.assessment_id
+)
+
+class ScoreDistribution(Base):
+    """Per-job histogram of completed percentages, stored as a Fenwick tree"""
+    __tablename__ = "score_distributions"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    tree = Column(JSON, nullable=False)  # Fenwick tree over 0.1% buckets
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LLMRateLimit(Base):
+    """Token bucket shared by every process calling the LLM, see llm_client.SharedTokenBucket"""
+    __tablename__ = "llm_rate_limits"
+    
+    name = Column(String, primary_key=True)  # the model the limit applies to
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix time of the last refill
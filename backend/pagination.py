@@ -0,0 +1,29 @@
+"""Keyset pagination shared by the job listing and the leaderboard.
+
+A cursor is the sort key of the last row served, as urlsafe base64 JSON.
+Pages are queried with ``limit + 1`` rows; the extra row only tells whether
+another page follows.
+"""
+import base64
+import json
+from typing import Any, Callable, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+def encode_cursor(*key: Any) -> str:
+    """Cursor for a sort key of JSON-serializable values"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> Tuple[Any, ...]:
+    """The sort key, each value passed through its parser; raises ValueError for a malformed cursor"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(key) != len(parsers):
+            raise ValueError(f"Expected {len(parsers)} values, got {len(key)}")
+        return tuple(parse(value) for parse, value in zip(parsers, key))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+def split_page(rows: Sequence[T], limit: int) -> Tuple[List[T], bool]:
+    """(page, whether another page follows) from rows fetched with limit + 1"""
+    return list(rows[:limit]), len(rows) > limit
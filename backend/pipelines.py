@@ -0,0 +1,92 @@
+from typing import Any, Dict
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from gemini_service import gemini_service
+from job_listing import replace_skills
+from models import Assessment, Evaluation, Job, Question
+from question_cache import mark_changed
+from task_queue import task_handler
+
+# ==================== JOB CREATION ====================
+
+def _mark_generation_failed(db: Session, payload: Dict[str, Any], error: str):
+    job = db.get(Job, payload["job_id"])
+    if job:
+        job.generation_status = "failed"
+        job.generation_error = error
+
+@task_handler("generate_job_questions", on_failure=_mark_generation_failed)
+def generate_job_questions(db: Session, payload: Dict[str, Any]):
+    """Parse the job description and create the job's question set"""
+    job = db.get(Job, payload["job_id"])
+    if not job:
+        return
+
+    # Parse JD using Gemini
+    jd_data = gemini_service.parse_job_description(job.description)
+    job.required_skills = jd_data.get("required_skills", [])
+    job.experience_level = jd_data.get("experience_level", "Mid-level")
+    job.role_type = jd_data.get("role_type", "General")
+    job.domain_knowledge = jd_data.get("domain_knowledge", [])
+    replace_skills(db, job.id, job.required_skills)
+
+    # Generate questions using Gemini
+    questions = gemini_service.generate_questions(jd_data)
+    if not questions:
+        raise RuntimeError("No questions were generated")
+
+    # A retried task replaces whatever an earlier attempt left behind
+    db.execute(delete(Question).where(Question.job_id == job.id))
+    db.execute(insert(Question), [{
+        "job_id": job.id,
+        "question_type": q_data["question_type"],
+        "question_text": q_data["question_text"],
+        "difficulty": q_data["difficulty"],
+        "skill_tested": q_data["skill_tested"],
+        "options": q_data.get("options"),
+        "correct_answer": q_data.get("correct_answer"),
+        "test_cases": q_data.get("test_cases"),
+        "starter_code": q_data.get("starter_code"),
+        "max_score": q_data["max_score"]
+    } for q_data in questions])
+    mark_changed(db, job.id)
+
+    job.generation_status = "ready"
+    job.generation_error = None
+    db.commit()
+
+# ==================== EVALUATION REPORTS ====================
+
+def _mark_report_failed(db: Session, payload: Dict[str, Any], error: str):
+    evaluation = db.get(Evaluation, payload["evaluation_id"])
+    if evaluation:
+        evaluation.report_status = "failed"
+        evaluation.report_error = error
+
+@task_handler("generate_evaluation_report", on_failure=_mark_report_failed)
+def generate_evaluation_report(db: Session, payload: Dict[str, Any]):
+    """Write the AI report onto an evaluation that was scored at completion"""
+    evaluation = db.get(Evaluation, payload["evaluation_id"])
+    if not evaluation or evaluation.report_status == "ready":
+        return
+    assessment = db.get(Assessment, evaluation.assessment_id)
+
+    report_data = {
+        "total_score": assessment.total_score,
+        "percentage": assessment.percentage,
+        "skill_scores": evaluation.skill_scores,
+        "is_suspicious": assessment.is_suspicious
+    }
+    # No canned fallback here: an unusable response fails the attempt and is retried
+    ai_report = gemini_service.generate_evaluation_report(report_data, fallback=False)
+
+    evaluation.strengths = ai_report.get("strengths", [])
+    evaluation.weaknesses = ai_report.get("weaknesses", [])
+    evaluation.skill_gaps = ai_report.get("skill_gaps", [])
+    evaluation.ai_summary = ai_report.get("ai_summary", "")
+    evaluation.recommendation = ai_report.get("recommendation", "")
+    evaluation.report_status = "ready"
+    evaluation.report_error = None
+    db.commit()
@@ -0,0 +1,110 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import Question
+from response_cache import LRUCache
+from schemas import QuestionResponse
+
+settings = get_settings()
+
+# Only what candidates see; the answer key and test cases are never selected
+CANDIDATE_COLUMNS = tuple(getattr(Question, name) for name in QuestionResponse.model_fields)
+
+_payload_adapter = TypeAdapter(List[QuestionResponse])
+
+def candidate_questions_query(job_id: int):
+    return select(*CANDIDATE_COLUMNS).where(Question.job_id == job_id).order_by(Question.id)
+
+def serialize_questions(rows) -> bytes:
+    """JSON body of GET /assessments/{id}/questions for a job's question rows"""
+    return _payload_adapter.dump_json(_payload_adapter.validate_python(rows, from_attributes=True))
+
+class QuestionPayloadCache:
+    """Per-job cache of the serialized candidate question list.
+
+    Entries are dropped once a transaction that changed the job's questions
+    commits (see mark_changed); the TTL bounds staleness for changes made by
+    other processes. A per-job generation counter keeps a load that raced a
+    change from storing the old payload.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.enabled = ttl_seconds > 0
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._generations: Dict[int, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, job_id: int) -> Tuple[Optional[bytes], int]:
+        """Cached payload (or None) and the generation to pass back to put"""
+        payload = self._cache.get(str(job_id)) if self.enabled else None
+        with self._lock:
+            if payload is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return payload, self._generations.get(job_id, 0)
+
+    def put(self, job_id: int, payload: bytes, generation: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._generations.get(job_id, 0) != generation:
+                return
+            self._cache.set(str(job_id), payload)
+
+    def invalidate(self, *job_ids: int):
+        with self._lock:
+            for job_id in job_ids:
+                self._generations[job_id] = self._generations.get(job_id, 0) + 1
+                self._cache.delete(str(job_id))
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / requests if requests else 0.0
+            }
+
+question_cache = QuestionPayloadCache(max_entries=settings.QUESTION_CACHE_ENTRIES,
+                                      ttl_seconds=settings.QUESTION_CACHE_TTL_SECONDS)
+
+def mark_changed(db: Session, job_id: int):
+    """Invalidate a job's payload when ``db`` commits.
+
+    ORM changes to Question rows are tracked automatically; call this for
+    bulk insert/update/delete statements, which bypass the flush.
+    """
+    db.info.setdefault("changed_question_jobs", set()).add(job_id)
+
+@event.listens_for(Session, "after_flush")
+def _track_question_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Question):
+            # A question moved between jobs changes both
+            for job_id in (obj.job_id, *inspect(obj).attrs.job_id.history.deleted):
+                if job_id is not None:
+                    mark_changed(session, job_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_jobs(session):
+    job_ids = session.info.pop("changed_question_jobs", None)
+    if job_ids:
+        question_cache.invalidate(*job_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_jobs(session):
+    session.info.pop("changed_question_jobs", None)
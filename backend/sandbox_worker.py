@@ -0,0 +1,130 @@
+"""Long-lived sandbox process for grading candidate code.
+
+Started by assessment_utils.SandboxPool. Reads one JSON job per line on stdin:
+
+    {"code": "...", "test_cases": [{"input": "..."}, ...]}
+
+Test cases carry only their input; the parent compares outputs. Each job runs
+in a child forked from this warm process, so candidate code never touches the
+worker's own state or a later job's. The child compiles the code once and
+the worker relays one JSON line per test case as soon as it finishes,
+followed by {"done": true}. Per-case timeouts are enforced by the parent,
+which kills the worker's process group when a case overruns.
+"""
+import builtins
+import io
+import json
+import os
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+def apply_limits(memory_limit_mb: int):
+    try:
+        import resource
+    except ImportError:  # Windows: no rlimits, the parent's timeout still applies
+        return
+    if memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (10 * 1024 * 1024, 10 * 1024 * 1024))
+
+def run_case(compiled, test_case) -> dict:
+    """Mirror of the old one-shot script: run the module, then main(test_input)"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    namespace = {"__name__": "__main__", "__builtins__": dict(vars(builtins))}
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exec(compiled, namespace)
+            test_input = eval(str(test_case.get("input")), namespace)
+            result = namespace["main"](test_input) if "main" in namespace else eval(test_input, namespace)
+            print(result)
+        except KeyboardInterrupt:
+            raise
+        except BaseException:
+            traceback.print_exc()
+    return {"actual": stdout.getvalue().strip(), "error": stderr.getvalue() or None}
+
+def run_job(job: dict, write):
+    """Compile once and write a reply per test case"""
+    test_cases = job.get("test_cases") or []
+    try:
+        compiled = compile(job["code"] or "", "<submission>", "exec")
+    except Exception as e:
+        error = "".join(traceback.format_exception_only(type(e), e))
+        for index in range(len(test_cases)):
+            write({"index": index, "actual": "", "error": error})
+        return
+    for index, test_case in enumerate(test_cases):
+        reply = run_case(compiled, test_case)
+        reply["index"] = index
+        write(reply)
+
+def run_forked(job: dict, requests, replies):
+    """Run a job in a child process, relaying its replies.
+
+    The child gets its own pipe and closes the protocol descriptors before
+    running any candidate code, and the pipe is dropped once the child is
+    gone, so nothing the code leaves behind can answer for a later job.
+    """
+    expected = len(job.get("test_cases") or [])
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        requests.close()
+        os.close(replies.fileno())
+        with os.fdopen(write_fd, "w", encoding="utf-8") as out:
+            def write(reply):
+                out.write(json.dumps(reply, default=str) + "\n")
+                out.flush()
+            try:
+                run_job(job, write)
+            finally:
+                os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "r", encoding="utf-8") as child:
+        for index in range(expected):
+            line = child.readline()
+            if not line:
+                break  # the child died; the parent reports the crash
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                break
+            if not isinstance(reply, dict) or reply.get("index") != index:
+                break
+            replies.write(json.dumps(reply) + "\n")
+            replies.flush()
+    os.waitpid(pid, 0)
+
+def main():
+    memory_limit_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+
+    # Keep the protocol on private descriptors so candidate code that reads
+    # stdin or writes to fd 1 directly can't corrupt it
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    sys.stdin = open(os.devnull, "r")
+
+    apply_limits(memory_limit_mb)
+
+    for line in requests:
+        job = json.loads(line)
+        if hasattr(os, "fork"):
+            run_forked(job, requests, replies)
+        else:
+            # No fork (Windows): the pool uses each worker for one submission only
+            def write(reply):
+                replies.write(json.dumps(reply, default=str) + "\n")
+                replies.flush()
+            run_job(job, write)
+        replies.write(json.dumps({"done": True}) + "\n")
+        replies.flush()
+
+if __name__ == "__main__":
+    main()
@@ -35,12 +35,19 @@ class JobResponse(BaseModel):
     domain_knowledge: Optional[List[str]]
     duration_minutes: int
     cutoff_percentage: float
+    generation_status: Optional[str] = None
     created_at: datetime
     is_active: bool
     
     class Config:
         from_attributes = True
 
+class JobStatusResponse(BaseModel):
+    job_id: int
+    status: str  # generating, ready, failed
+    question_count: int
+    error: Optional[str] = None
+
 # Question schemas
 class QuestionResponse(BaseModel):
     id: int
@@ -92,21 +99,33 @@ class SubmissionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class SubmissionBatch(BaseModel):
+    submissions: List[SubmissionCreate]
+
+class SubmissionStatus(BaseModel):
+    question_id: int
+    status: str  # graded, pending (graded on completion), busy (grader full, resubmit), not_found
+    submission_id: Optional[int] = None
+    score: Optional[float] = None
+    is_correct: Optional[bool] = None
+    ai_feedback: Optional[str] = None
+
 # Evaluation schemas
 class EvaluationResponse(BaseModel):
     id: int
     assessment_id: int
-    strengths: List[str]
-    weaknesses: List[str]
-    skill_gaps: List[str]
+    strengths: Optional[List[str]] = None
+    weaknesses: Optional[List[str]] = None
+    skill_gaps: Optional[List[str]] = None
     skill_scores: Dict[str, float]
     mcq_score: float
     subjective_score: float
     coding_score: float
     percentile: float
     qualified: bool
-    ai_summary: str
-    recommendation: str
+    ai_summary: Optional[str] = None
+    recommendation: Optional[str] = None
+    report_status: Optional[str] = None  # AI report fields are null until "ready"
     
     class Config:
         from_attributes = True
@@ -0,0 +1,222 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+from models import BackgroundTask
+
+settings = get_settings()
+
+# kind -> (handler, on_failure); both are called as fn(db, payload)
+_handlers: Dict[str, tuple] = {}
+
+def task_handler(kind: str, on_failure: Optional[Callable[[Session, Dict[str, Any], str], None]] = None):
+    """Register a handler for a task kind.
+
+    ``on_failure(db, payload, error)`` runs once the task has used up all of
+    its attempts.
+    """
+    def decorator(fn: Callable[[Session, Dict[str, Any]], None]):
+        _handlers[kind] = (fn, on_failure)
+        return fn
+    return decorator
+
+def enqueue(db: Session, kind: str, payload: Dict[str, Any],
+            max_attempts: Optional[int] = None) -> BackgroundTask:
+    """Add a task to the session; it is persisted by the caller's commit"""
+    task = BackgroundTask(
+        kind=kind,
+        payload=payload,
+        status="queued",
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+        run_after=datetime.utcnow()
+    )
+    db.add(task)
+    return task
+
+class TaskWorkerPool:
+    """Threads that poll the background_tasks table and run registered handlers.
+
+    Claiming is a conditional UPDATE on the task row, so several pools (one per
+    API process) can share the same table without running a task twice.
+    """
+
+    def __init__(self, session_factory=SessionLocal, num_workers: int = None,
+                 poll_interval: float = None, stale_after: float = None):
+        self.session_factory = session_factory
+        self.num_workers = num_workers if num_workers is not None else settings.TASK_WORKERS
+        self.poll_interval = poll_interval if poll_interval is not None else settings.TASK_POLL_INTERVAL_SECONDS
+        self.stale_after = stale_after if stale_after is not None else settings.TASK_STALE_AFTER_SECONDS
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {"completed": 0, "retried": 0, "failed": 0}
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._next_requeue = 0.0  # time.monotonic() of the next stale-task sweep
+
+    def start(self):
+        self.requeue_stale()
+        self._next_requeue = time.monotonic() + self.stale_after / 2
+        self._stop.clear()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._run, args=(f"{self._worker_prefix}:{i}",),
+                                      name=f"task-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Wake idle workers, e.g. right after enqueueing"""
+        self._wakeup.set()
+
+    def requeue_stale(self):
+        """Put back tasks whose worker died mid-run (crash or restart)"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(BackgroundTask)
+                .where(BackgroundTask.status == "running", BackgroundTask.locked_at < cutoff)
+                .values(status="queued", locked_at=None, locked_by=None)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def run_pending(self, worker_id: str = "inline") -> int:
+        """Drain every runnable task on the calling thread; returns the count"""
+        count = 0
+        while self._run_one(worker_id):
+            count += 1
+        return count
+
+    def _run(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                if self._run_one(worker_id):
+                    continue
+                self._sweep_stale()
+            except Exception:
+                traceback.print_exc()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _sweep_stale(self):
+        """requeue_stale every stale_after / 2 seconds while idle, so tasks left
+        running by a crashed process are picked up without a restart"""
+        with self._lock:
+            if time.monotonic() < self._next_requeue:
+                return
+            self._next_requeue = time.monotonic() + self.stale_after / 2
+        self.requeue_stale()
+
+    def _claim(self, db: Session, worker_id: str) -> Optional[BackgroundTask]:
+        now = datetime.utcnow()
+        candidates = db.query(BackgroundTask.id).filter(
+            BackgroundTask.status == "queued",
+            BackgroundTask.run_after <= now,
+            BackgroundTask.kind.in_(list(_handlers))
+        ).order_by(BackgroundTask.id).limit(self.num_workers + 1).all()
+
+        for (task_id,) in candidates:
+            claimed = db.execute(
+                update(BackgroundTask)
+                .where(BackgroundTask.id == task_id, BackgroundTask.status == "queued")
+                .values(status="running", locked_at=now, locked_by=worker_id,
+                        attempts=BackgroundTask.attempts + 1)
+            ).rowcount
+            db.commit()
+            if claimed:
+                return db.get(BackgroundTask, task_id)
+        return None
+
+    def _run_one(self, worker_id: str) -> bool:
+        db = self.session_factory()
+        try:
+            task = self._claim(db, worker_id)
+            if task is None:
+                return False
+
+            handler, on_failure = _handlers[task.kind]
+            task_id, payload = task.id, dict(task.payload or {})
+            try:
+                handler(db, payload)
+            except Exception as e:
+                db.rollback()
+                # e.g. LLMUnavailable says when the provider is worth trying again
+                self._record_failure(db, task_id, payload, on_failure, repr(e),
+                                     getattr(e, "retry_after", 0))
+            else:
+                task = db.get(BackgroundTask, task_id)
+                task.status = "done"
+                task.finished_at = datetime.utcnow()
+                task.last_error = None
+                db.commit()
+                self._count("completed")
+            return True
+        finally:
+            db.close()
+
+    def _record_failure(self, db: Session, task_id: int, payload: Dict[str, Any],
+                        on_failure, error: str, retry_after: float = 0):
+        task = db.get(BackgroundTask, task_id)
+        task.last_error = error
+        task.locked_at = None
+        task.locked_by = None
+        if task.attempts < task.max_attempts:
+            # Exponential backoff between attempts: 2s, 4s, 8s, ...
+            task.status = "queued"
+            task.run_after = datetime.utcnow() + timedelta(seconds=max(2 ** task.attempts, retry_after))
+            db.commit()
+            self._count("retried")
+            return
+
+        task.status = "failed"
+        task.finished_at = datetime.utcnow()
+        db.commit()
+        self._count("failed")
+        if on_failure:
+            try:
+                on_failure(db, payload, error)
+                db.commit()
+            except Exception:
+                db.rollback()
+                traceback.print_exc()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            depth = dict(db.query(BackgroundTask.status, func.count(BackgroundTask.id))
+                         .filter(BackgroundTask.status.in_(["queued", "running"]))
+                         .group_by(BackgroundTask.status).all())
+        finally:
+            db.close()
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "workers": len(self._threads),
+            "queued": depth.get("queued", 0),
+            "running": depth.get("running", 0),
+            **counters
+        }
+
+task_pool = TaskWorkerPool()
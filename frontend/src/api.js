@@ -33,6 +33,7 @@ export const login = (email, password) => {
 export const createJob = (data) => api.post('/jobs', data);
 export const getJobs = () => api.get('/jobs');
 export const getJob = (id) => api.get(`/jobs/${id}`);
+export const getJobStatus = (id) => api.get(`/jobs/${id}/status`);
 
 // Assessments
 export const createAssessment = (data) => api.post('/assessments', data);
@@ -46,7 +47,8 @@ export const completeAssessment = (assessmentId) =>
 // Results
 export const getResults = (assessmentId) => 
   api.get(`/assessments/${assessmentId}/results`);
-export const getLeaderboard = (jobId) => 
-  api.get(`/jobs/${jobId}/leaderboard`);
+// Paged: pass the previous response's X-Next-Cursor header as cursor
+export const getLeaderboard = (jobId, cursor) => 
+  api.get(`/jobs/${jobId}/leaderboard`, { params: cursor ? { cursor } : {} });
 
 export default api;
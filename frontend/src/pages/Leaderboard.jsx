@@ -6,22 +6,31 @@ export default function Leaderboard() {
   const { jobId } = useParams();
   const [leaderboard, setLeaderboard] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchLeaderboard();
   }, []);
 
-  const fetchLeaderboard = async () => {
+  const fetchLeaderboard = async (cursor = null) => {
     try {
-      const response = await getLeaderboard(jobId);
-      setLeaderboard(response.data);
+      const response = await getLeaderboard(jobId, cursor);
+      setLeaderboard((entries) => (cursor ? [...entries, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (err) {
       console.error('Error fetching leaderboard:', err);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchLeaderboard(nextCursor);
+  };
+
   if (loading) {
     return <div className="loading">Loading leaderboard...</div>;
   }
@@ -88,6 +97,14 @@ export default function Leaderboard() {
             </tbody>
           </table>
         )}
+
+        {nextCursor && (
+          <div style={{ textAlign: 'center', marginTop: '16px' }}>
+            <button className="btn btn-secondary" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Show more candidates'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Top 3 Highlight */}
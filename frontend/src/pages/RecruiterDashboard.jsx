@@ -18,6 +18,13 @@ export default function RecruiterDashboard() {
     fetchJobs();
   }, []);
 
+  // Questions are generated in the background; refresh until every job is done
+  useEffect(() => {
+    if (!jobs.some((job) => job.generation_status === 'generating')) return;
+    const timer = setTimeout(fetchJobs, 3000);
+    return () => clearTimeout(timer);
+  }, [jobs]);
+
   const fetchJobs = async () => {
     try {
       const response = await getJobs();
@@ -111,7 +118,7 @@ export default function RecruiterDashboard() {
             </div>
 
             <button type="submit" className="btn btn-primary" disabled={loading}>
-              {loading ? 'Creating & Generating Questions...' : 'Create Job'}
+              {loading ? 'Creating Job...' : 'Create Job'}
             </button>
           </form>
         </div>
@@ -121,6 +128,12 @@ export default function RecruiterDashboard() {
         {jobs.map((job) => (
           <div key={job.id} className="card">
             <h3 style={{ marginBottom: '12px', color: '#667eea' }}>{job.title}</h3>
+            {job.generation_status === 'generating' && (
+              <span className="badge badge-medium">Generating questions...</span>
+            )}
+            {job.generation_status === 'failed' && (
+              <span className="badge badge-hard">Question generation failed</span>
+            )}
             <p style={{ color: '#6b7280', marginBottom: '12px', fontSize: '14px' }}>
               {job.description.substring(0, 150)}...
             </p>
@@ -11,6 +11,13 @@ export default function Results() {
     fetchResults();
   }, []);
 
+  // The AI report is written in the background; poll until it lands
+  useEffect(() => {
+    if (evaluation?.report_status !== 'pending') return;
+    const timer = setTimeout(fetchResults, 3000);
+    return () => clearTimeout(timer);
+  }, [evaluation]);
+
   const fetchResults = async () => {
     try {
       const response = await getResults(assessmentId);
@@ -97,54 +104,72 @@ export default function Results() {
         </div>
       </div>
 
-      {/* Strengths & Weaknesses */}
-      <div className="grid grid-2">
+      {evaluation.report_status === 'pending' && (
         <div className="card">
-          <h3 style={{ marginBottom: '16px', color: '#10b981' }}>✅ Strengths</h3>
-          <ul style={{ paddingLeft: '20px', lineHeight: '2' }}>
-            {evaluation.strengths.map((strength, idx) => (
-              <li key={idx} style={{ color: '#374151' }}>{strength}</li>
-            ))}
-          </ul>
+          <h3 style={{ marginBottom: '8px' }}>🤖 AI Analysis</h3>
+          <p style={{ color: '#6b7280' }}>Your detailed report is being generated...</p>
         </div>
+      )}
 
+      {evaluation.report_status === 'failed' && (
         <div className="card">
-          <h3 style={{ marginBottom: '16px', color: '#ef4444' }}>⚠️ Areas for Improvement</h3>
-          <ul style={{ paddingLeft: '20px', lineHeight: '2' }}>
-            {evaluation.weaknesses.map((weakness, idx) => (
-              <li key={idx} style={{ color: '#374151' }}>{weakness}</li>
-            ))}
-          </ul>
+          <h3 style={{ marginBottom: '8px' }}>🤖 AI Analysis</h3>
+          <p style={{ color: '#6b7280' }}>The detailed report is unavailable right now.</p>
         </div>
-      </div>
+      )}
 
-      {/* Skill Gaps */}
-      {evaluation.skill_gaps.length > 0 && (
-        <div className="card">
-          <h3 style={{ marginBottom: '16px' }}>📚 Skills to Develop</h3>
-          <div>
-            {evaluation.skill_gaps.map((skill, idx) => (
-              <span key={idx} className="badge badge-medium">{skill}</span>
-            ))}
+      {evaluation.report_status !== 'pending' && evaluation.report_status !== 'failed' && (
+        <>
+          {/* Strengths & Weaknesses */}
+          <div className="grid grid-2">
+            <div className="card">
+              <h3 style={{ marginBottom: '16px', color: '#10b981' }}>✅ Strengths</h3>
+              <ul style={{ paddingLeft: '20px', lineHeight: '2' }}>
+                {evaluation.strengths.map((strength, idx) => (
+                  <li key={idx} style={{ color: '#374151' }}>{strength}</li>
+                ))}
+              </ul>
+            </div>
+
+            <div className="card">
+              <h3 style={{ marginBottom: '16px', color: '#ef4444' }}>⚠️ Areas for Improvement</h3>
+              <ul style={{ paddingLeft: '20px', lineHeight: '2' }}>
+                {evaluation.weaknesses.map((weakness, idx) => (
+                  <li key={idx} style={{ color: '#374151' }}>{weakness}</li>
+                ))}
+              </ul>
+            </div>
           </div>
-        </div>
-      )}
 
-      {/* AI Summary */}
-      <div className="card">
-        <h3 style={{ marginBottom: '16px' }}>🤖 AI Analysis</h3>
-        <p style={{ color: '#374151', lineHeight: '1.8', marginBottom: '16px' }}>
-          {evaluation.ai_summary}
-        </p>
-        <div style={{ 
-          background: evaluation.qualified ? '#d1fae5' : '#fee2e2', 
-          padding: '16px', 
-          borderRadius: '8px',
-          color: evaluation.qualified ? '#065f46' : '#991b1b'
-        }}>
-          <strong>Recommendation:</strong> {evaluation.recommendation}
-        </div>
-      </div>
+          {/* Skill Gaps */}
+          {evaluation.skill_gaps.length > 0 && (
+            <div className="card">
+              <h3 style={{ marginBottom: '16px' }}>📚 Skills to Develop</h3>
+              <div>
+                {evaluation.skill_gaps.map((skill, idx) => (
+                  <span key={idx} className="badge badge-medium">{skill}</span>
+                ))}
+              </div>
+            </div>
+          )}
+
+          {/* AI Summary */}
+          <div className="card">
+            <h3 style={{ marginBottom: '16px' }}>🤖 AI Analysis</h3>
+            <p style={{ color: '#374151', lineHeight: '1.8', marginBottom: '16px' }}>
+              {evaluation.ai_summary}
+            </p>
+            <div style={{ 
+              background: evaluation.qualified ? '#d1fae5' : '#fee2e2', 
+              padding: '16px', 
+              borderRadius: '8px',
+              color: evaluation.qualified ? '#065f46' : '#991b1b'
+            }}>
+              <strong>Recommendation:</strong> {evaluation.recommendation}
+            </div>
+          </div>
+        </>
+      )}
     </div>
   );
 }